@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Customer, CustomerAccount, CustomerOTP, Transaction, Beneficiary
+from .models import Customer, CustomerAccount, Transaction, Beneficiary, DailyTransferSpend, \
+    TransactionReferenceCounter, IdempotencyKey
 
 
 class CustomerAccountTabularAdmin(admin.TabularInline):
@@ -14,8 +15,10 @@ class CustomerAdmin(admin.ModelAdmin):
 
 admin.site.register(Customer, CustomerAdmin)
 
-admin.site.register(CustomerOTP)
 admin.site.register(Transaction)
 admin.site.register(Beneficiary)
+admin.site.register(DailyTransferSpend)
+admin.site.register(TransactionReferenceCounter)
+admin.site.register(IdempotencyKey)
 
 
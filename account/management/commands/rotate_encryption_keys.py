@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from account.models import Customer
+from account.utils import rotate_text
+
+
+class Command(BaseCommand):
+    help = "Re-encrypt customer BVN and transaction PIN values with the primary key in FERNET_KEYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        rotated = 0
+        last_id = 0
+
+        while True:
+            customers = list(
+                Customer.objects.filter(id__gt=last_id).order_by("id").only("id", "bvn", "transaction_pin")[:batch_size]
+            )
+            if not customers:
+                break
+
+            for customer in customers:
+                if customer.bvn:
+                    customer.bvn = rotate_text(customer.bvn)
+                if customer.transaction_pin:
+                    customer.transaction_pin = rotate_text(customer.transaction_pin)
+
+            Customer.objects.bulk_update(customers, ["bvn", "transaction_pin"])
+            rotated += len(customers)
+            last_id = customers[-1].id
+
+        self.stdout.write(self.style.SUCCESS(f"Rotated encrypted fields for {rotated} customers"))
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.3 on 2026-10-18 16:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0022_customer_daily_limit_customer_transfer_limit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTransferSpend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='account.customer')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailytransferspend',
+            constraint=models.UniqueConstraint(fields=('customer', 'date'), name='unique_customer_daily_transfer_spend'),
+        ),
+    ]
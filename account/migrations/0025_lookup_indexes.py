@@ -0,0 +1,37 @@
+# Generated by Django 4.0.3 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+from citbank.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Built without blocking writes to the tables; CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('account', '0024_transactionreferencecounter'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customeraccount',
+            index=models.Index(fields=['account_no', 'customer'], name='customer_account_no_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='customerotp',
+            index=models.Index(fields=['phone_number'], name='customer_otp_phone_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['reference'], name='transaction_reference_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['customer', '-created_on', '-id'], name='transaction_cust_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['-created_on', '-id'], name='transaction_recent_idx'),
+        ),
+    ]
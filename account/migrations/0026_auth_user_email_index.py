@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_email_index(apps, schema_editor):
+    # CONCURRENTLY IS POSTGRESQL ONLY; SQLITE TEST DATABASES GET A PLAIN INDEX
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'CREATE INDEX {concurrently}IF NOT EXISTS account_auth_user_email_idx ON auth_user (email);')
+
+
+def drop_email_index(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS account_auth_user_email_idx;')
+
+
+class Migration(migrations.Migration):
+    """User is not our model, so the email index used by password and OTP resets is created with SQL."""
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('account', '0025_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.0.3 on 2026-10-18 16:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0027_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='CustomerOTP',
+        ),
+    ]
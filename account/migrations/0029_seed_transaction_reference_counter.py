@@ -0,0 +1,32 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def seed_counter(apps, schema_editor):
+    # References made earlier today by the old count based code keep their numbers; continue after them
+    Transaction = apps.get_model('account', 'Transaction')
+    TransactionReferenceCounter = apps.get_model('account', 'TransactionReferenceCounter')
+
+    today = timezone.localdate()
+    prefix = f"C{today:%y%m%d}"
+    last_value = Transaction.objects.filter(created_on__date=today).count()
+    for reference in Transaction.objects.filter(reference__startswith=prefix).values_list('reference', flat=True):
+        suffix = reference[len(prefix):]
+        if suffix.isdigit():
+            last_value = max(last_value, int(suffix))
+
+    counter, _ = TransactionReferenceCounter.objects.get_or_create(date=today)
+    if counter.last_value < last_value:
+        counter.last_value = last_value
+        counter.save(update_fields=['last_value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0028_delete_customerotp'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0029_seed_transaction_reference_counter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='status',
+            field=models.CharField(choices=[('in_progress', 'In Progress'), ('charged', 'Charged'), ('completed', 'Completed'), ('failed', 'Failed')], default='in_progress', max_length=20),
+        ),
+    ]
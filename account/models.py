@@ -1,5 +1,6 @@
 import uuid
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -17,6 +18,10 @@ BENEFICIARY_TYPE_CHOICES = (
     ('data', 'Data'), ('utility', 'Utility')
 )
 
+IDEMPOTENCY_STATUS_CHOICES = (
+    ('in_progress', 'In Progress'), ('charged', 'Charged'), ('completed', 'Completed'), ('failed', 'Failed')
+)
+
 NOTIFICATION_TYPE_CHOICES = (
     ('enquiry_email', 'Enquiry Email'), ('feedback_email', 'Feedback Email'),
     ('account_manager_rating', 'Account Manager Rating')
@@ -63,17 +68,13 @@ class CustomerAccount(models.Model):
     card_no = models.CharField(max_length=200, blank=True, null=True)
     active = models.BooleanField(default=True)
 
-    def __str__(self):
-        return f"{self.customer.user} - {self.account_no}"
-
-
-class CustomerOTP(models.Model):
-    phone_number = models.CharField(max_length=24, blank=True, null=True)
-    otp = models.CharField(max_length=6, blank=True, null=True)
-    updated_on = models.DateTimeField(auto_now=True)
+    class Meta:
+        indexes = [
+            models.Index(fields=['account_no', 'customer'], name='customer_account_no_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.phone_number} - {self.otp}"
+        return f"{self.customer.user} - {self.account_no}"
 
 
 class Transaction(models.Model):
@@ -90,10 +91,63 @@ class Transaction(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['reference'], name='transaction_reference_idx'),
+            models.Index(fields=['customer', '-created_on', '-id'], name='transaction_cust_recent_idx'),
+            models.Index(fields=['-created_on', '-id'], name='transaction_recent_idx'),
+        ]
+
     def __str__(self):
         return f"{self.customer} - {self.reference}"
 
 
+class DailyTransferSpend(models.Model):
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['customer', 'date'], name='unique_customer_daily_transfer_spend'),
+        ]
+
+    def __str__(self):
+        return f"{self.customer} - {self.date}: {self.amount}"
+
+
+class TransactionReferenceCounter(models.Model):
+    date = models.DateField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.date}: {self.last_value}"
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    path = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=IDEMPOTENCY_STATUS_CHOICES, default='in_progress')
+    response_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    created_on = models.DateTimeField(auto_now_add=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['created_on'], name='idempotency_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.key}: {self.status}"
+
+
 class Beneficiary(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
     beneficiary_type = models.CharField(max_length=200, choices=BENEFICIARY_TYPE_CHOICES, default='')
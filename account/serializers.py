@@ -27,13 +27,19 @@ class CustomerSerializer(serializers.ModelSerializer):
             return obj.image.url
 
     def get_bvn_number(self, obj):
+        # list views can pass BVNs decrypted in one batch as context['bvns']
+        bvns = self.context.get('bvns')
+        if bvns is not None:
+            return bvns.get(obj.id)
+
         bvn = None
         if obj.bvn:
             bvn = decrypt_text(obj.bvn)
         return bvn
 
     def get_accounts(self, obj):
-        return CustomerAccountSerializer(CustomerAccount.objects.filter(customer=obj), many=True).data
+        # uses the prefetched customeraccount_set when the view provides one
+        return CustomerAccountSerializer(obj.customeraccount_set.all(), many=True).data
 
     class Meta:
         model = Customer
@@ -44,6 +50,8 @@ class TransactionSerializer(serializers.ModelSerializer):
     customer = serializers.SerializerMethodField()
 
     def get_customer(self, obj):
+        if obj.customer is None:
+            return None
         return obj.customer.get_customer_detail()
 
     class Meta:
@@ -1,3 +1,271 @@
-from django.test import TestCase
+import decimal
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.transaction import atomic
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import AccessToken
+
+from bankone.api import CachedResponse, get_cached_account_by_account_no
+
+from .models import (
+    Customer, CustomerAccount, DailyTransferSpend, IdempotencyKey, Transaction, TransactionReferenceCounter
+)
+from .utils import (
+    PAYMENT_NOT_CONFIRMED, encrypt_text, generate_new_otp, get_request_hash, next_transaction_ref_code,
+    reserve_daily_spend, update_transaction_status, verify_otp
+)
+
+
+def create_customer(username, password=None, transactions=0):
+    user = User.objects.create_user(username=username, email=f"{username}@example.com", password=password)
+    customer = Customer.objects.create(
+        user=user, phone_number="08000000000", bvn=encrypt_text("22222222222"), active=True
+    )
+    CustomerAccount.objects.create(customer=customer, account_no=f"{customer.id:010d}")
+    Transaction.objects.bulk_create([
+        Transaction(customer=customer, amount=100, reference=f"T{customer.id:05d}-{number:03d}") for number in range(transactions)
+    ])
+    return customer
+
+
+class LoginQueryCountTest(TestCase):
+    password = "Passw0rd!"
+
+    def setUp(self):
+        self.customer = create_customer("login_user", password=self.password)
+        CustomerAccount.objects.create(customer=self.customer, account_no="0000000099")
+
+    def test_login_payload(self):
+        # user, session create and save (each in a savepoint), last_login, customer with user, accounts
+        with self.assertNumQueries(11):
+            response = self.client.post(
+                "/account/login/", {"username": "login_user", "password": self.password},
+                content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["data"]["accounts"]), 2)
+
+
+class TransactionViewQueryCountTest(TestCase):
+
+    def setUp(self):
+        self.customer = create_customer("history_user", transactions=15)
+        create_customer("other_user", transactions=5)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.customer.user)}"
+
+    def test_page_number_pagination(self):
+        # JWT user, count, and one page with the customer and user joined in
+        with self.assertNumQueries(3):
+            response = self.client.get("/account/transaction/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 15)
+        self.assertEqual(len(response.json()["results"]), 10)
+
+    def test_keyset_pagination(self):
+        # JWT user and one page; no count unless asked for
+        with self.assertNumQueries(2):
+            response = self.client.get("/account/transaction/?pagination=cursor")
+        self.assertEqual(len(response.json()["results"]), 10)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(response.json()["next"])
+        self.assertEqual(len(response.json()["results"]), 5)
+        self.assertIsNone(response.json()["next"])
+
+    def test_detail(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/account/transaction/T{self.customer.id:05d}-003/")
+        self.assertEqual(response.json()["customer"]["username"], "history_user")
+
+
+class TransactionReferenceCounterTest(TestCase):
+
+    def test_counter_is_seeded_after_todays_references(self):
+        seed = importlib.import_module("account.migrations.0029_seed_transaction_reference_counter")
+        customer = create_customer("reference_user")
+        prefix = f"C{timezone.localdate():%y%m%d}"
+        TransactionReferenceCounter.objects.all().delete()
+        for reference in [f"{prefix}00001", f"{prefix}00002", f"{prefix}01234"]:
+            Transaction.objects.create(customer=customer, amount=100, reference=reference)
+
+        seed.seed_counter(apps, None)
+        self.assertEqual(next_transaction_ref_code(), f"{prefix}01235")
+
+
+class DailySpendConcurrencyTest(TransactionTestCase):
+
+    def setUp(self):
+        self.customer = create_customer("limit_user")
+        self.customer.daily_limit = 1000
+        self.customer.save()
+
+    def reserve(self, amount):
+        with atomic():
+            return reserve_daily_spend(self.customer, decimal.Decimal(amount))
+
+    def reserve_in_thread(self, amount, barrier):
+        try:
+            barrier.wait()
+            return self.reserve(amount)
+        finally:
+            connection.close()
+
+    def spent(self):
+        return DailyTransferSpend.objects.get(customer=self.customer, date=timezone.localdate()).amount
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_parallel_transfers_cannot_exceed_the_limit(self):
+        barrier = threading.Barrier(10)
+        with ThreadPoolExecutor(10) as executor:
+            results = list(executor.map(lambda _: self.reserve_in_thread(300, barrier), range(10)))
+
+        self.assertEqual(results.count(True), 3)
+        self.assertEqual(self.spent(), 900)
+
+    def test_failed_transfer_releases_its_reservation(self):
+        self.assertTrue(self.reserve(800))
+        transaction = Transaction.objects.create(customer=self.customer, amount=800, reference="T-LIMIT-1")
+        self.assertFalse(self.reserve(300))
+
+        update_transaction_status(transaction, "failed")
+        self.assertEqual(self.spent(), 0)
+        self.assertTrue(self.reserve(300))
+        self.assertEqual(self.spent(), 300)
+
+
+class IdempotencyKeyTest(TestCase):
+
+    def setUp(self):
+        self.customer = create_customer("idempotent_user")
+        self.customer.transaction_pin = encrypt_text("1234")
+        self.customer.save()
+        self.account_no = self.customer.customeraccount_set.get().account_no
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(self.customer.user)}"
+
+    def transfer(self, key="transfer-1", amount="500"):
+        data = {
+            "account_number": self.account_no, "transaction_type": "transfer", "transaction_option": "same_bank",
+            "amount": amount, "narration": "rent", "transaction_pin": "1234"
+        }
+        return self.client.post(
+            "/account/transaction/", data, content_type="application/json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_gets_the_stored_response(self):
+        first, retry = self.transfer(), self.transfer()
+
+        self.assertEqual(retry.json()["reference_code"], first.json()["reference_code"])
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Transaction.objects.filter(customer=self.customer).count(), 1)
+
+    def test_key_reused_for_a_different_body(self):
+        self.transfer()
+        self.assertEqual(self.transfer(amount="600").status_code, 422)
+
+    def test_retry_while_the_first_request_runs(self):
+        retries = []
+
+        def create_transaction(request):
+            retries.append(self.transfer())
+            return True, "C0000000001"
+
+        with mock.patch("account.views.create_transaction", side_effect=create_transaction):
+            self.assertEqual(self.transfer().status_code, 200)
+        self.assertEqual(retries[0].status_code, 409)
+
+    def test_error_before_the_charge_releases_the_key(self):
+        with mock.patch("account.views.create_transaction", side_effect=RuntimeError("database down")):
+            with self.assertRaises(RuntimeError):
+                self.transfer()
+
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.transfer().status_code, 200)
+
+    def test_timeout_after_the_charge_is_not_charged_again(self):
+        data = {
+            "disco_type": "EKEDC_PREPAID", "account_no": self.account_no, "meter_no": "123", "amount": "1000",
+            "phone_no": "0800", "transaction_pin": "1234"
+        }
+
+        def vend():
+            return self.client.post(
+                "/bills/electricity/", data, content_type="application/json", HTTP_IDEMPOTENCY_KEY="vend-1"
+            )
+
+        with mock.patch("billpayment.utils.charge_customer", side_effect=requests.ReadTimeout) as charge:
+            with self.assertRaises(requests.ReadTimeout):
+                vend()
+            retry = vend()
+
+        charge.assert_called_once()
+        self.assertEqual(retry.status_code, 500)
+        self.assertEqual(retry.json()["detail"], PAYMENT_NOT_CONFIRMED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(IdempotencyKey.objects.get().status, "failed")
+
+    def test_request_hash_accepts_a_list_body(self):
+        request = Request(
+            RequestFactory().post("/account/transaction/", "[1, 2]", content_type="application/json"),
+            parsers=[JSONParser()]
+        )
+        self.assertEqual(len(get_request_hash(request)), 64)
+
+
+class AccountEnquiryCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def lookup(self, *responses):
+        with mock.patch("bankone.api.get_account_by_account_no", side_effect=responses) as enquiry:
+            for _ in responses:
+                get_cached_account_by_account_no("0000000001")
+        return enquiry.call_count
+
+    def test_errors_returned_with_status_200_are_not_cached(self):
+        failed = CachedResponse(200, {"IsSuccessful": False, "Message": "Account not found"})
+        self.assertEqual(self.lookup(failed, failed), 2)
+
+    def test_found_accounts_are_cached(self):
+        found = CachedResponse(200, {"CustomerDetails": {"Name": "ADA, OBI"}})
+        self.assertEqual(self.lookup(found, found), 1)
+
+
+@override_settings(OTP_TTL=600, OTP_MAX_ATTEMPTS=3)
+class OTPTest(TestCase):
+    phone_number = "08012345678"
+
+    def setUp(self):
+        cache.clear()
+        self.otp = generate_new_otp(self.phone_number)
+
+    def test_code_works_once(self):
+        self.assertTrue(verify_otp(self.phone_number, self.otp))
+        self.assertFalse(verify_otp(self.phone_number, self.otp))
+
+    def test_code_is_dropped_after_too_many_wrong_guesses(self):
+        wrong = "x" * len(self.otp)
+        for _ in range(2):
+            self.assertFalse(verify_otp(self.phone_number, wrong))
+        self.assertTrue(verify_otp(self.phone_number, self.otp))
+
+        self.otp = generate_new_otp(self.phone_number)
+        for _ in range(3):
+            self.assertFalse(verify_otp(self.phone_number, wrong))
+        self.assertFalse(verify_otp(self.phone_number, self.otp))
+
+    def test_code_expires(self):
+        expired = timezone.now().timestamp() + 601
+        with mock.patch("time.time", return_value=expired):
+            self.assertFalse(verify_otp(self.phone_number, self.otp))
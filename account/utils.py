@@ -1,21 +1,34 @@
 import base64
 import datetime
 import decimal
+import hashlib
+import hmac
+import json
 import uuid
 import re
 
-from threading import Thread
+from contextvars import ContextVar
+from functools import lru_cache, wraps
 from django.conf import settings
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.db.models import F
+from django.db.transaction import atomic
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from rest_framework import status
+from rest_framework.response import Response
 
-from .models import Customer, CustomerAccount, CustomerOTP, Transaction
+from .models import Customer, CustomerAccount, Transaction, DailyTransferSpend, \
+    TransactionReferenceCounter, IdempotencyKey
 
-from bankone.api import get_account_by_account_no, send_sms, send_email
+from bankone.api import get_cached_account_by_account_no, invalidate_account_cache
+from notification.utils import queue_sms, queue_email
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 
 
 def format_phone_number(phone_number):
@@ -23,43 +36,87 @@ def format_phone_number(phone_number):
     return phone_number
 
 
+def otp_cache_key(phone_number):
+    return f"otp:{format_phone_number(phone_number)}"
+
+
 def generate_new_otp(phone_number):
     otp = str(uuid.uuid4().int)[:6]
-    phone_number = format_phone_number(phone_number)
-    otp_obj, _ = CustomerOTP.objects.get_or_create(phone_number=phone_number)
-    otp_obj.otp = otp
-    otp_obj.save()
+    key = otp_cache_key(phone_number)
+    cache.set(key, otp, timeout=settings.OTP_TTL)
+    cache.delete(f"{key}:attempts")
     return otp
 
 
+def verify_otp(phone_number, otp):
+    """
+    Check an OTP and use it up when it matches.
+
+    Codes expire after OTP_TTL seconds and are dropped after OTP_MAX_ATTEMPTS wrong guesses.
+    """
+    key = otp_cache_key(phone_number)
+    stored_otp = cache.get(key)
+    if not (otp and stored_otp):
+        return False
+
+    if not constant_time_compare(str(otp), stored_otp):
+        attempts_key = f"{key}:attempts"
+        cache.add(attempts_key, 0, timeout=settings.OTP_TTL)
+        if cache.incr(attempts_key) >= settings.OTP_MAX_ATTEMPTS:
+            cache.delete_many([key, attempts_key])
+        return False
+
+    # Only the request that actually deletes the code gets True, so a code works once
+    return cache.delete(key)
+
+
 def send_otp_message(phone_number, content, subject, account_no, email):
     phone_number = format_phone_number(phone_number)
     success = False
-    Thread(target=send_email, args=[email, subject, content]).start()
-    # Thread(target=send_email_temporal_fix, args=[email, content, subject]).start()
-    response = send_sms(account_no, content, receiver=phone_number)
-    # if response['Status'] is False:
-    #     detail = 'OTP not sent via sms, please check your email'
-    #     return True, detail
+    queue_email(email, subject, content)
+    queue_sms(account_no, content, receiver=phone_number)
     detail = 'OTP successfully sent'
 
     return True, detail
 
 
+@lru_cache(maxsize=4)
+def _build_cipher(secret_key: str, rotation_keys: tuple):
+    # Keys in FERNET_KEYS take precedence for encryption, the SECRET_KEY derived key is kept last
+    # so values encrypted before a rotation can still be decrypted.
+    legacy_key = base64.urlsafe_b64encode(secret_key.encode()[:32])
+    keys = [Fernet(key) for key in rotation_keys] + [Fernet(legacy_key)]
+    return MultiFernet(keys)
+
+
+def get_cipher():
+    return _build_cipher(settings.SECRET_KEY, tuple(settings.FERNET_KEYS))
+
+
 def encrypt_text(text: str):
-    key = base64.urlsafe_b64encode(settings.SECRET_KEY.encode()[:32])
-    fernet = Fernet(key)
-    secure = fernet.encrypt(f"{text}".encode())
+    secure = get_cipher().encrypt(f"{text}".encode())
     return secure.decode()
 
 
 def decrypt_text(text: str):
-    key = base64.urlsafe_b64encode(settings.SECRET_KEY.encode()[:32])
-    fernet = Fernet(key)
-    decrypt = fernet.decrypt(text.encode())
+    decrypt = get_cipher().decrypt(text.encode())
     return decrypt.decode()
 
 
+def encrypt_texts(texts: list):
+    cipher = get_cipher()
+    return [cipher.encrypt(f"{text}".encode()).decode() for text in texts]
+
+
+def decrypt_texts(texts: list):
+    cipher = get_cipher()
+    return [cipher.decrypt(text.encode()).decode() if text else None for text in texts]
+
+
+def rotate_text(text: str):
+    return get_cipher().rotate(text.encode()).decode()
+
+
 def create_new_customer(data, account_no):
     success = False
 
@@ -111,7 +168,7 @@ def create_new_customer(data, account_no):
 
     try:
         # API to check if account exist
-        response = get_account_by_account_no(account_no)
+        response = get_cached_account_by_account_no(account_no)
         if response.status_code != 200:
             for response in response.json():
                 # print("from for loop: ", response, f"response.json: ", response.json())
@@ -128,7 +185,7 @@ def create_new_customer(data, account_no):
 
         phone_number = format_phone_number(phone_number)
 
-        if token != CustomerOTP.objects.get(phone_number=phone_number).otp:
+        if not verify_otp(phone_number, token):
             detail = 'OTP is not valid'
             return success, detail
 
@@ -173,6 +230,8 @@ def create_new_customer(data, account_no):
         customer_acct.account_type = account['AccountType']
         customer_acct.save()
 
+    invalidate_account_cache(account_no)
+
     detail = 'Registration is successful'
     return True, detail
 
@@ -228,28 +287,24 @@ def validate_password(new_password):
     return check, detail
 
 
-def generate_transaction_ref_code(code):
-    if len(code) == 1:
-        code = f"0000{code}"
-    elif len(code) == 2:
-        code = f"000{code}"
-    elif len(code) == 3:
-        code = f"00{code}"
-    else:
-        code = f"0{code}"
-
-    now = datetime.date.today()
-    day = str(now.day)
-    if len(day) < 2:
-        day = f"0{day}"
-    month = str(now.month)
-    if len(month) < 2:
-        month = f"0{month}"
-    year = str(now.year)[2:]
+def generate_transaction_ref_code(code, date=None):
+    now = date or datetime.date.today()
+    ref_code = f"C{now:%y%m%d}{str(code).zfill(5)}"
+    return ref_code
 
-    ref_code = f"C{year}{month}{day}{code}"
 
-    return ref_code
+def next_transaction_ref_code():
+    # One counter row per day, bumped by a single UPDATE. The row stays locked until the surrounding
+    # transaction commits, so call this outside other transactions or transfers queue behind each other.
+    today = timezone.localdate()
+    counter = TransactionReferenceCounter.objects.filter(date=today)
+    with atomic():
+        if not counter.update(last_value=F('last_value') + 1):
+            # FIRST REFERENCE OF THE DAY
+            TransactionReferenceCounter.objects.get_or_create(date=today)
+            counter.update(last_value=F('last_value') + 1)
+        last_value = counter.values_list('last_value', flat=True).get()
+    return generate_transaction_ref_code(last_value, today)
 
 
 def create_transaction(request):
@@ -279,28 +334,57 @@ def create_transaction(request):
     if decimal.Decimal(amount) > customer.transfer_limit:
         return False, "amount is greater than your limit. please contact the bank"
 
-    # Check Daily Transfer Limit
-    today = datetime.datetime.today()
-    today_trans = Transaction.objects.filter(customer=customer, status="success", created_on__day=today.day).aggregate(Sum("amount"))["amount__sum"] or 0
-    current_limit = float(amount) + float(today_trans)
-    if current_limit > customer.daily_limit:
-        return False, f"Your current daily transfer limit is NGN{customer.daily_limit}, please contact the bank"
-
     # generate transaction reference using the format CYYMMDDCODES
-    now = datetime.datetime.now()
-    start_date = now.date()
-    end_date = datetime.date(now.year, 1 if now.month == 12 else now.month + 1, 1) - datetime.timedelta(days=1)
-    month_transaction = Transaction.objects.filter(created_on__range=(start_date, end_date)).count()
-    code = str(month_transaction + 1)
-    ref_code = generate_transaction_ref_code(code)
-
-    transaction = Transaction.objects.create(customer=customer, transaction_type=trans_type, narration=narration,
-                                             transaction_option=trans_option, amount=amount, reference=ref_code,
-                                             beneficiary_name=beneficiary_name, biller_name=biller_name,
-                                             beneficiary_number=beneficiary_number)
+    # TAKEN BEFORE THE TRANSACTION BELOW SO THE COUNTER ROW IS ONLY LOCKED FOR ITS OWN UPDATE;
+    # A TRANSFER REJECTED BY THE DAILY LIMIT LEAVES A GAP IN THE NUMBERING
+    ref_code = next_transaction_ref_code()
+
+    with atomic():
+        # Check Daily Transfer Limit
+        if not reserve_daily_spend(customer, decimal.Decimal(amount)):
+            return False, f"Your current daily transfer limit is NGN{customer.daily_limit}, please contact the bank"
+
+        transaction = Transaction.objects.create(customer=customer, transaction_type=trans_type, narration=narration,
+                                                 transaction_option=trans_option, amount=amount, reference=ref_code,
+                                                 beneficiary_name=beneficiary_name, biller_name=biller_name,
+                                                 beneficiary_number=beneficiary_number)
     return True, transaction.reference
 
 
+def reserve_daily_spend(customer, amount):
+    # Must run inside a transaction: the counter row stays locked until the transfer is saved,
+    # so concurrent transfers for the same customer are checked one after the other.
+    today = timezone.localdate()
+    DailyTransferSpend.objects.get_or_create(customer=customer, date=today)
+    spend = DailyTransferSpend.objects.select_for_update().get(customer=customer, date=today)
+
+    if spend.amount + amount > customer.daily_limit:
+        return False
+
+    spend.amount += amount
+    spend.save(update_fields=['amount', 'updated_on'])
+    return True
+
+
+def adjust_daily_spend(customer, date, amount):
+    DailyTransferSpend.objects.filter(customer=customer, date=date).update(amount=F('amount') + amount)
+
+
+def update_transaction_status(transaction, trans_status):
+    # Failed transfers give their amount back to the day's limit
+    with atomic():
+        previous_status = transaction.status
+        transaction.status = trans_status
+        transaction.save()
+
+        if transaction.customer_id and previous_status != trans_status and "failed" in (previous_status, trans_status):
+            amount = decimal.Decimal(str(transaction.amount))
+            if trans_status == "failed":
+                amount = -amount
+            adjust_daily_spend(transaction.customer_id, timezone.localdate(transaction.created_on), amount)
+    return transaction
+
+
 def generate_random_ref_code():
 
     now = datetime.date.today()
@@ -333,7 +417,131 @@ def confirm_trans_pin(request):
     return True, "PIN Correct"
 
 
+PAYMENT_NOT_CONFIRMED = "The payment could not be confirmed, please check your transactions before trying again"
 
+# The IdempotencyKey of the request being handled, for mark_idempotency_key_charged
+current_idempotency_key = ContextVar('current_idempotency_key', default=None)
 
 
-
+def get_request_hash(request):
+    # Keyed with SECRET_KEY because the body includes the transaction PIN
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    payload = json.dumps([request.path, data], sort_keys=True, default=str)
+    return hmac.new(settings.SECRET_KEY.encode(), payload.encode(), hashlib.sha256).hexdigest()
+
+
+def claim_idempotency_key(user, key, path, request_hash):
+    # Returns (record, None) when this request should run, or (None, response) to send back instead
+    now = timezone.now()
+    for _ in range(2):
+        try:
+            with atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, path=path, request_hash=request_hash), None
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+
+        if record is None:
+            continue
+
+        if record.created_on < now - datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL):
+            IdempotencyKey.objects.filter(id=record.id, created_on=record.created_on).delete()
+            continue
+
+        if record.path != path or record.request_hash != request_hash:
+            return None, Response(
+                {'detail': 'Idempotency-Key has already been used for a different request'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+
+        if record.status in ('completed', 'failed'):
+            return None, Response(record.response_body, status=record.response_code, headers={'Idempotent-Replayed': 'true'})
+
+        abandoned = now - datetime.timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+        if record.updated_on < abandoned:
+            # TAKE OVER A KEY WHOSE REQUEST DIED WITHOUT RECORDING A RESPONSE, UNLESS IT HAD CHARGED THE CUSTOMER
+            if record.status == 'in_progress' and IdempotencyKey.objects.filter(
+                    id=record.id, status='in_progress', updated_on=record.updated_on).update(updated_on=now):
+                return record, None
+            if record.status == 'charged':
+                return None, Response({'detail': PAYMENT_NOT_CONFIRMED}, status=status.HTTP_409_CONFLICT)
+        break
+
+    return None, Response(
+        {'detail': 'A request with this Idempotency-Key is still being processed'}, status=status.HTTP_409_CONFLICT
+    )
+
+
+def mark_idempotency_key_charged():
+    # CALL JUST BEFORE MONEY MOVES. FROM HERE ON A FAILED REQUEST KEEPS ITS KEY, SO A RETRY AFTER A
+    # TIMEOUT GETS THE FAILURE BACK INSTEAD OF CHARGING THE CUSTOMER AGAIN
+    record = current_idempotency_key.get()
+    if record is not None and record.status == 'in_progress':
+        record.status = 'charged'
+        record.save(update_fields=['status', 'updated_on'])
+
+
+def fail_idempotency_key(record, response=None):
+    # A REQUEST THAT FAILED BEFORE CHARGING CAN BE RETRIED, SO ITS KEY IS RELEASED
+    if record.status == 'in_progress':
+        record.delete()
+        return
+
+    if response is None:
+        response = Response({'detail': PAYMENT_NOT_CONFIRMED}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    record.status = 'failed'
+    record.response_code = response.status_code
+    record.response_body = response.data
+    record.save(update_fields=['status', 'response_code', 'response_body', 'updated_on'])
+
+
+def complete_idempotency_key(record, response):
+    if response.status_code >= 500:
+        fail_idempotency_key(record, response)
+        return
+
+    record.status = 'completed'
+    record.response_code = response.status_code
+    record.response_body = response.data
+    record.save(update_fields=['status', 'response_code', 'response_body', 'updated_on'])
+
+
+def idempotent(view_method):
+    """
+    Run an APIView POST handler at most once per user and Idempotency-Key header.
+
+    Retries with the same key and body get the stored response back, while the first request is still running
+    they get 409, and reusing a key for a different body gets 422. Requests without the header run as before.
+
+    A request that errors is released for a retry only if it never reached mark_idempotency_key_charged; once
+    the customer may have been charged, retries get the stored failure instead.
+    """
+    @wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view_method(view, request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response(
+                {'detail': 'Idempotency-Key cannot be longer than 255 characters'}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        record, response = claim_idempotency_key(request.user, key, request.path, get_request_hash(request))
+        if response is not None:
+            return response
+
+        token = current_idempotency_key.set(record)
+        try:
+            response = view_method(view, request, *args, **kwargs)
+        except Exception:
+            fail_idempotency_key(record)
+            raise
+        finally:
+            current_idempotency_key.reset(token)
+
+        complete_idempotency_key(record, response)
+        return response
+
+    return wrapper
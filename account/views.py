@@ -1,7 +1,5 @@
 import json
-import uuid
 import requests
-from threading import Thread
 
 from django.db.models import Q
 from django.contrib.auth.models import User
@@ -14,13 +12,15 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
-from .paginations import CustomPagination
+from .paginations import CustomPagination, KeysetPagination
 from .serializers import CustomerSerializer, TransactionSerializer, BeneficiarySerializer
 from .utils import create_new_customer, authenticate_user, generate_new_otp, \
-    send_otp_message, decrypt_text, encrypt_text, create_transaction, confirm_trans_pin
+    send_otp_message, decrypt_text, encrypt_text, create_transaction, confirm_trans_pin, update_transaction_status, \
+    idempotent, verify_otp
 
-from bankone.api import get_account_by_account_no, send_enquiry_email, log_request
-from .models import CustomerAccount, Customer, CustomerOTP, Transaction, Beneficiary
+from bankone.api import get_cached_account_by_account_no, log_request
+from notification.utils import queue_email
+from .models import CustomerAccount, Customer, Transaction, Beneficiary
 
 bankOneToken = settings.BANK_ONE_AUTH_TOKEN
 
@@ -55,15 +55,16 @@ class RerouteView(APIView):
         header = json.loads(header)
         payload = json.loads(payload)
 
-        if verb == "GET":
+        # ACCOUNT NUMBER ENQUIRIES ARE SERVED FROM THE SHORT-LIVED ACCOUNT CACHE
+        account_no = payload.get("accountNumber") if isinstance(payload, dict) else None
+        if verb == "GET" and account_no and url.startswith(f"{settings.BANK_ONE_BASE_URL}/Customer/GetByAccountNo/"):
+            response = get_cached_account_by_account_no(account_no).json()
+        elif verb == "GET":
             response = requests.request("GET", url, params=payload, headers=header).json()
         if verb == "POST":
             response = requests.request("POST", url, data=payload, headers=header).json()
 
-        log_request(
-            "CALLING BANKONE_API FROM MOBILE ||", f"URL: {url}", f"headers: {header}",
-            f"payload: {payload}", f"response: {response}"
-        )
+        log_request(verb, url, payload, response, headers=header, label="reroute")
         return Response(response)
 
 
@@ -91,7 +92,9 @@ class LoginView(APIView):
         details, success = authenticate_user(request)
         if success is True:
             try:
-                customer = Customer.objects.get(user=request.user)
+                customer = Customer.objects.select_related('user').prefetch_related('customeraccount_set').get(
+                    user=request.user
+                )
             except Exception as ex:
                 return Response({"detail": "An error occurred", "error": str(ex)}, status=status.HTTP_400_BAD_REQUEST)
             data = CustomerSerializer(customer).data
@@ -118,7 +121,7 @@ class SignupOtpView(APIView):
         if CustomerAccount.objects.filter(account_no=account_no).exists():
             return Response({'detail': 'Account already registered'}, status=status.HTTP_400_BAD_REQUEST)
 
-        response = get_account_by_account_no(account_no)
+        response = get_cached_account_by_account_no(account_no)
         if response.status_code != 200:
             for response in response.json():
                 detail = response['error-Message']
@@ -143,7 +146,8 @@ class CustomerProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        query = CustomerSerializer(Customer.objects.get(user=request.user), context={'request': request}).data
+        customer = Customer.objects.select_related('user').prefetch_related('customeraccount_set').get(user=request.user)
+        query = CustomerSerializer(customer, context={'request': request}).data
         return Response(query)
 
     def put(self, request):
@@ -240,22 +244,19 @@ class ForgotPasswordView(APIView):
             user = User.objects.get(email=email)
             phone_number = Customer.objects.get(user=user).phone_number
 
-            if otp != CustomerOTP.objects.get(phone_number=phone_number).otp:
-                return Response({"detail": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST)
-
             if not (new_password.isnumeric() and len(new_password) == 6):
                 return Response({"detail": "Password can only be 6 digit"}, status=status.HTTP_400_BAD_REQUEST)
 
             if new_password != confirm_password:
                 return Response({"detail": "Passwords does not match"}, status=status.HTTP_400_BAD_REQUEST)
 
+            # CHECKED LAST BECAUSE A VALID OTP IS USED UP HERE
+            if not verify_otp(phone_number, otp):
+                return Response({"detail": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST)
+
             if user is not None:
                 user.set_password(new_password)
                 user.save()
-                # CustomerOTP.objects.get(phone_number=phone_number).update(otp=str(uuid.uuid4().int)[:6])
-                new_otp = CustomerOTP.objects.get(phone_number=phone_number)
-                new_otp.otp = str(uuid.uuid4().int)[:6]
-                new_otp.save()
             return Response({"detail": "Successfully changed Password, Login with your new password."})
 
         except (Exception,) as err:
@@ -313,10 +314,15 @@ class ResetTransactionPinView(APIView):
             return Response({'detail': 'You may have missed the PIN or OTP input, please check'},
                             status=status.HTTP_400_BAD_REQUEST)
 
+        if not (new_pin.isnumeric() and len(new_pin) == 4):
+            return Response({"detail": "PIN must be 4 digits"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if new_pin != confirm_new_pin:
+            return Response({"detail": "PIN mismatch"}, status=status.HTTP_400_BAD_REQUEST)
+
         customer = Customer.objects.get(user=request.user)
-        otp = CustomerOTP.objects.get(phone_number=customer.phone_number).otp
 
-        if token != otp:
+        if not verify_otp(customer.phone_number, token):
             return Response({"detail": "OTP is not valid"}, status=status.HTTP_400_BAD_REQUEST)
 
         old_tran_pin = decrypt_text(customer.transaction_pin)
@@ -324,20 +330,10 @@ class ResetTransactionPinView(APIView):
         if old_tran_pin == new_pin:
             return Response({"detail": "PIN not allowed"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not (new_pin.isnumeric() and len(new_pin) == 4):
-            return Response({"detail": "PIN must be 4 digits"}, status=status.HTTP_400_BAD_REQUEST)
-
-        if new_pin != confirm_new_pin:
-            return Response({"detail": "PIN mismatch"}, status=status.HTTP_400_BAD_REQUEST)
-
         encrypt_new_pin = encrypt_text(new_pin)
         customer.transaction_pin = encrypt_new_pin
         customer.save()
 
-        customer_token = CustomerOTP.objects.get(phone_number=customer.phone_number)
-        customer_token.otp = str(uuid.uuid4().int)[:6]
-        customer_token.save()
-
         return Response({"detail": "You have successfully reset your transaction PIN"})
 
 
@@ -350,7 +346,7 @@ class TransactionView(APIView, CustomPagination):
 
         if ref:
             try:
-                data = TransactionSerializer(Transaction.objects.get(reference=ref)).data
+                data = TransactionSerializer(Transaction.objects.select_related('customer__user').get(reference=ref)).data
                 return Response(data)
             except Exception as err:
                 return Response({"detail": str(err)})
@@ -367,11 +363,18 @@ class TransactionView(APIView, CustomPagination):
                                 status=status.HTTP_400_BAD_REQUEST)
             query = query & Q(created_on__range=[date_from, date_to])
 
-        queryset = Transaction.objects.filter(query).order_by('-id').distinct()
-        transaction = self.paginate_queryset(queryset, request)
+        queryset = Transaction.objects.filter(query).select_related('customer__user')
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination()
+            transaction = paginator.paginate_queryset(queryset, request)
+            data = paginator.get_paginated_response(TransactionSerializer(transaction, many=True).data).data
+            return Response(data)
+
+        transaction = self.paginate_queryset(queryset.order_by('-id'), request)
         data = self.get_paginated_response(TransactionSerializer(transaction, many=True).data).data
         return Response(data)
 
+    @idempotent
     def post(self, request):
 
         success, response = confirm_trans_pin(request)
@@ -392,8 +395,7 @@ class TransactionView(APIView, CustomPagination):
 
         try:
             transaction = Transaction.objects.get(reference=ref)
-            transaction.status = trans_status
-            transaction.save()
+            update_transaction_status(transaction, trans_status)
             return Response({"detail": "Successfully updated transaction"})
         except Exception as err:
             return Response({"detail": "An error has occurred", "error": str(err)}, status=status.HTTP_400_BAD_REQUEST)
@@ -531,7 +533,7 @@ class FeedbackView(APIView):
         else:
             subject, receiver = f"ENQUIRY FROM {name}", enquiry_email
 
-        Thread(target=send_enquiry_email, args=[request.user.email, receiver, subject, message])
+        queue_email(receiver, subject, message, mail_from=request.user.email)
 
         return Response({"detail": "Message sent successfully"})
 
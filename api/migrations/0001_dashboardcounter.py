@@ -0,0 +1,45 @@
+# Generated by Django 4.0.3 on 2026-10-18 16:33
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def populate_counter(apps, schema_editor):
+    Customer = apps.get_model('account', 'Customer')
+    values = {'total_customer': Customer.objects.count(), 'reconciled_on': timezone.now()}
+    for model_name, prefix in (('Airtime', 'airtime'), ('Data', 'data'), ('CableTV', 'cable_tv')):
+        model = apps.get_model('billpayment', model_name)
+        values[f'{prefix}_count'] = model.objects.count()
+        values[f'{prefix}_purchase_total'] = model.objects.filter(
+            status__iexact='success').aggregate(Sum('amount'))['amount__sum'] or 0
+    apps.get_model('api', 'DashboardCounter').objects.update_or_create(id=1, defaults=values)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('account', '0028_delete_customerotp'),
+        ('billpayment', '0011_electricity_retry_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_customer', models.IntegerField(default=0)),
+                ('airtime_count', models.IntegerField(default=0)),
+                ('data_count', models.IntegerField(default=0)),
+                ('cable_tv_count', models.IntegerField(default=0)),
+                ('airtime_purchase_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('data_purchase_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('cable_tv_purchase_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('reconciled_on', models.DateTimeField(blank=True, null=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_counter, migrations.RunPython.noop),
+    ]
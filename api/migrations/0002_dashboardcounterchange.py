@@ -0,0 +1,27 @@
+# Generated by Django 4.0.3 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounterChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_customer', models.IntegerField(default=0)),
+                ('airtime_count', models.IntegerField(default=0)),
+                ('data_count', models.IntegerField(default=0)),
+                ('cable_tv_count', models.IntegerField(default=0)),
+                ('airtime_purchase_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('data_purchase_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('cable_tv_purchase_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
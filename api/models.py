@@ -1,3 +1,32 @@
 from django.db import models
 
-# Create your models here.
+
+class DashboardCounter(models.Model):
+    # Single row (pk=1) folded from DashboardCounterChange rows and corrected by reconcile_dashboard_counter
+    total_customer = models.IntegerField(default=0)
+    airtime_count = models.IntegerField(default=0)
+    data_count = models.IntegerField(default=0)
+    cable_tv_count = models.IntegerField(default=0)
+    airtime_purchase_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    data_purchase_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    cable_tv_purchase_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    reconciled_on = models.DateTimeField(blank=True, null=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard counters: {self.updated_on}"
+
+
+class DashboardCounterChange(models.Model):
+    # Inserted by api.signals instead of updating the counter row, so concurrent purchases never wait on it
+    total_customer = models.IntegerField(default=0)
+    airtime_count = models.IntegerField(default=0)
+    data_count = models.IntegerField(default=0)
+    cable_tv_count = models.IntegerField(default=0)
+    airtime_purchase_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    data_purchase_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    cable_tv_purchase_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Dashboard counter change: {self.created_on}"
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from account.models import Customer
+from .utils import BILL_PAYMENT_COUNTERS, is_successful, update_dashboard_counter
+
+COUNTER_FIELDS = {model: (count_field, total_field) for model, count_field, total_field in BILL_PAYMENT_COUNTERS}
+
+
+def counted_amount(status, amount):
+    return Decimal(str(amount or 0)) if is_successful(status) else Decimal(0)
+
+
+def remember_purchase_state(sender, instance, update_fields=None, **kwargs):
+    # Reads what the stored row adds to the purchase total, only for updates that can change it.
+    # None means the total is unaffected by this save.
+    instance._counted_amount = Decimal(0)
+    if instance._state.adding:
+        return
+    if update_fields is not None and not {"status", "amount"} & set(update_fields):
+        instance._counted_amount = None
+        return
+    stored = sender.objects.filter(pk=instance.pk).values("status", "amount").first() or {}
+    instance._counted_amount = counted_amount(stored.get("status"), stored.get("amount"))
+
+
+def bill_payment_saved(sender, instance, created, **kwargs):
+    count_field, total_field = COUNTER_FIELDS[sender]
+    changes = {count_field: 1 if created else 0}
+    if instance._counted_amount is not None:
+        changes[total_field] = counted_amount(instance.status, instance.amount) - instance._counted_amount
+    update_dashboard_counter(**changes)
+
+
+def bill_payment_deleted(sender, instance, **kwargs):
+    count_field, total_field = COUNTER_FIELDS[sender]
+    changes = {count_field: -1}
+    if not {"status", "amount"} & instance.get_deferred_fields():
+        changes[total_field] = -counted_amount(instance.status, instance.amount)
+    update_dashboard_counter(**changes)
+
+
+def customer_saved(sender, instance, created, **kwargs):
+    if created:
+        update_dashboard_counter(total_customer=1)
+
+
+def customer_deleted(sender, instance, **kwargs):
+    update_dashboard_counter(total_customer=-1)
+
+
+def connect_signals():
+    for model in COUNTER_FIELDS:
+        pre_save.connect(remember_purchase_state, sender=model, dispatch_uid=f"dashboard_presave_{model.__name__}")
+        post_save.connect(bill_payment_saved, sender=model, dispatch_uid=f"dashboard_save_{model.__name__}")
+        post_delete.connect(bill_payment_deleted, sender=model, dispatch_uid=f"dashboard_delete_{model.__name__}")
+
+    post_save.connect(customer_saved, sender=Customer, dispatch_uid="dashboard_save_customer")
+    post_delete.connect(customer_deleted, sender=Customer, dispatch_uid="dashboard_delete_customer")
@@ -1,3 +1,93 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from account.tests import create_customer
+from api.models import DashboardCounterChange
+from api.utils import reconcile_dashboard_counter
+from billpayment.models import Airtime
+
+
+class AdminTransferQueryCountTest(TestCase):
+
+    def setUp(self):
+        for number in range(3):
+            create_customer(f"transfer_user_{number}", transactions=5)
+
+    def test_page_number_pagination(self):
+        # count, and one page with the customer and user joined in
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/transfers/")
+        self.assertEqual(response.json()["count"], 15)
+        self.assertEqual(len(response.json()["results"]), 10)
+
+    def test_keyset_pagination(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/transfers/?pagination=cursor")
+        self.assertEqual(len(response.json()["results"]), 10)
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/transfers/?pagination=cursor&count=true")
+        self.assertEqual(response.json()["count"], 15)
+
+
+@override_settings(ADMIN_LIST_CHUNK_SIZE=5)
+class AdminCustomerQueryCountTest(TestCase):
+
+    def setUp(self):
+        for number in range(12):
+            create_customer(f"listed_user_{number}")
+
+    def test_paginated(self):
+        # count, one page of customers with users, and their accounts
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/customer/?page=1")
+        self.assertEqual(response.json()["count"], 12)
+        self.assertEqual(len(response.json()["results"]), 12)
+
+    def test_streamed(self):
+        # the ids, then customers with users and their accounts per chunk of 5
+        with self.assertNumQueries(1 + 3 * 2):
+            response = self.client.get("/api/customer/")
+            customers = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(customers), 12)
+        self.assertEqual(len({customer["id"] for customer in customers}), 12)
+
+    def test_detail(self):
+        customer = create_customer("detail_user")
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/customer/{customer.id}/")
+        self.assertEqual(len(response.json()["accounts"]), 1)
+
+
+class DashboardCounterTest(TestCase):
+
+    def setUp(self):
+        reconcile_dashboard_counter()
+
+    def test_changes_are_folded_into_the_homepage_counts(self):
+        create_customer("counted_user")
+        airtime = Airtime.objects.create(account_no="0000000001", beneficiary="0800", network="mtn", amount=100)
+        airtime.status = "success"
+        airtime.save()
+        Airtime.objects.create(account_no="0000000001", beneficiary="0800", network="mtn", amount=50, status="success")
+        Airtime.objects.get(amount=50).delete()
+        self.assertEqual(DashboardCounterChange.objects.count(), 5)
+
+        response = self.client.get("/api/")
+        self.assertEqual(response.json()["total_customer"], 1)
+        self.assertEqual(response.json()["airtime_count"], 1)
+        self.assertEqual(float(response.json()["airtime_purchase_total"]), 100)
+        self.assertFalse(DashboardCounterChange.objects.exists())
+
+    def test_loading_rows_runs_no_extra_queries(self):
+        for amount in range(5):
+            Airtime.objects.create(account_no="0000000001", beneficiary="0800", network="mtn", amount=amount)
+        with self.assertNumQueries(1):
+            list(Airtime.objects.all())
+
+    def test_reconcile_needs_admin_or_cron_secret(self):
+        self.assertEqual(self.client.get("/api/reconcile-dashboard/").status_code, 401)
+        with override_settings(CRON_SECRET="dashboard-secret"):
+            response = self.client.get("/api/reconcile-dashboard/", HTTP_X_CRON_SECRET="dashboard-secret")
+        self.assertEqual(response.status_code, 200)
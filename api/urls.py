@@ -8,4 +8,7 @@ urlpatterns = [
     path('customer/<int:pk>/', views.AdminCustomerAPIView.as_view(), name="customer-detail"),
     path('transfers/', views.AdminTransferAPIView.as_view(), name="transfer"),
     path('bill/', views.AdminBillPaymentAPIView.as_view(), name="bill"),
+
+    # CRON-JOBS
+    path('reconcile-dashboard/', views.ReconcileDashboardCronView.as_view(), name="reconcile-dashboard"),
 ]
@@ -0,0 +1,69 @@
+from django.db.models import F, Sum
+from django.db.transaction import atomic
+from django.utils import timezone
+
+from account.models import Customer
+from billpayment.models import Airtime, CableTV, Data
+from .models import DashboardCounter, DashboardCounterChange
+
+DASHBOARD_COUNTER_ID = 1
+FOLD_BATCH_SIZE = 5000
+
+# (MODEL, COUNT FIELD, SUCCESSFUL PURCHASE TOTAL FIELD)
+BILL_PAYMENT_COUNTERS = [
+    (Airtime, "airtime_count", "airtime_purchase_total"),
+    (Data, "data_count", "data_purchase_total"),
+    (CableTV, "cable_tv_count", "cable_tv_purchase_total"),
+]
+COUNTER_FIELDS = ["total_customer"] + [field for _, count, total in BILL_PAYMENT_COUNTERS for field in (count, total)]
+
+
+def is_successful(status):
+    return str(status or "").lower() == "success"
+
+
+def get_dashboard_counter():
+    fold_dashboard_changes()
+    counter = DashboardCounter.objects.filter(id=DASHBOARD_COUNTER_ID).first()
+    if counter is None:
+        counter = reconcile_dashboard_counter()
+    return counter
+
+
+def update_dashboard_counter(**changes):
+    # An insert rather than an UPDATE of the counter row; fold_dashboard_changes adds these up later
+    changes = {field: value for field, value in changes.items() if value}
+    if changes:
+        DashboardCounterChange.objects.create(**changes)
+
+
+def fold_dashboard_changes():
+    # Moves pending changes into the counter row. Only the rows read here are deleted, so changes
+    # committed meanwhile wait for the next fold.
+    with atomic():
+        if DashboardCounter.objects.select_for_update().filter(id=DASHBOARD_COUNTER_ID).first() is None:
+            return
+        changes = list(DashboardCounterChange.objects.order_by("id").values("id", *COUNTER_FIELDS)[:FOLD_BATCH_SIZE])
+        if not changes:
+            return
+
+        totals = {field: sum(change[field] for change in changes) for field in COUNTER_FIELDS}
+        DashboardCounter.objects.filter(id=DASHBOARD_COUNTER_ID).update(
+            **{field: F(field) + value for field, value in totals.items() if value}, updated_on=timezone.now()
+        )
+        DashboardCounterChange.objects.filter(id__in=[change["id"] for change in changes]).delete()
+
+
+def reconcile_dashboard_counter():
+    # Recount everything; corrects drift from queryset.update(), bulk operations and raw SQL, which skip signals.
+    # Changes pending before the recount are already part of it.
+    pending = list(DashboardCounterChange.objects.values_list("id", flat=True))
+    values = {"total_customer": Customer.objects.count(), "reconciled_on": timezone.now()}
+    for model, count_field, total_field in BILL_PAYMENT_COUNTERS:
+        values[count_field] = model.objects.count()
+        values[total_field] = model.objects.filter(status__iexact="success").aggregate(Sum("amount"))["amount__sum"] or 0
+
+    with atomic():
+        counter, _ = DashboardCounter.objects.update_or_create(id=DASHBOARD_COUNTER_ID, defaults=values)
+        DashboardCounterChange.objects.filter(id__in=pending).delete()
+    return counter
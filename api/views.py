@@ -1,13 +1,18 @@
-from django.contrib.auth.models import User
-from django.db.models import Q, Sum
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status, views
 
 from account.models import Customer, Transaction
 from account.serializers import CustomerSerializer, TransactionSerializer
-from account.paginations import CustomPagination
+from account.paginations import CustomPagination, KeysetPagination
+from account.utils import decrypt_texts
 from billpayment.models import Airtime, CableTV, Data
 from billpayment.serializers import AirtimeSerializer, DataSerializer, CableTVSerializer
+from citbank.permissions import IsAdminOrCronSecret
+from .utils import get_dashboard_counter, reconcile_dashboard_counter
 
 
 class Homepage(views.APIView):
@@ -16,38 +21,69 @@ class Homepage(views.APIView):
     def get(self, request):
         data = dict()
 
-        recent_customers = Customer.objects.all().order_by("-created_on")[:10]
-        total = Customer.objects.all().count()
+        recent_customers = Customer.objects.select_related("user").order_by("-created_on")[:10]
         recent = list()
         for customer in recent_customers:
             recent.append(customer.get_customer_detail())
 
-        airtime_count = Airtime.objects.all().count()
-        data_count = Data.objects.all().count()
-        cable_tv_count = CableTV.objects.all().count()
-
-        airtime_purchase_total = Airtime.objects.filter(status__iexact="success").aggregate(Sum("amount"))["amount__sum"] or 0
-        data_purchase_total = Data.objects.filter(status__iexact="success").aggregate(Sum("amount"))["amount__sum"] or 0
-        cable_tv_purchase_total = CableTV.objects.filter(status__iexact="success").aggregate(Sum("amount"))["amount__sum"] or 0
+        # COUNTS AND TOTALS COME FROM THE PRECOMPUTED COUNTER ROW
+        counter = get_dashboard_counter()
 
         data["recent_customer"] = recent
-        data["total_customer"] = total
-        data["airtime_count"] = airtime_count
-        data["data_count"] = data_count
-        data["cable_tv_count"] = cable_tv_count
-        data["airtime_purchase_total"] = airtime_purchase_total
-        data["data_purchase_total"] = data_purchase_total
-        data["cable_tv_purchase_total"] = cable_tv_purchase_total
+        data["total_customer"] = counter.total_customer
+        data["airtime_count"] = counter.airtime_count
+        data["data_count"] = counter.data_count
+        data["cable_tv_count"] = counter.cable_tv_count
+        data["airtime_purchase_total"] = counter.airtime_purchase_total
+        data["data_purchase_total"] = counter.data_purchase_total
+        data["cable_tv_purchase_total"] = counter.cable_tv_purchase_total
 
         return Response(data)
 
 
+class ReconcileDashboardCronView(views.APIView):
+    permission_classes = [IsAdminOrCronSecret]
+
+    def get(self, request):
+        reconcile_dashboard_counter()
+        return Response({"detail": "Dashboard counters reconciled"})
+
+
+def serialize_customers(customers, request):
+    # BVNs for the whole batch are decrypted together instead of once per serializer call
+    bvns = dict(zip([customer.id for customer in customers], decrypt_texts([customer.bvn for customer in customers])))
+    return CustomerSerializer(customers, many=True, context={'request': request, 'bvns': bvns}).data
+
+
+def stream_customers(customers, request):
+    # Writes one JSON array, loading and serializing ADMIN_LIST_CHUNK_SIZE customers at a time
+    chunk_size = settings.ADMIN_LIST_CHUNK_SIZE
+    renderer = JSONRenderer()
+    ids = customers.values_list('id', flat=True).iterator(chunk_size=chunk_size)
+    started = False
+
+    yield b'['
+    while True:
+        chunk_ids = [pk for _, pk in zip(range(chunk_size), ids)]
+        if not chunk_ids:
+            break
+
+        chunk = Customer.objects.filter(id__in=chunk_ids).select_related('user').prefetch_related(
+            'customeraccount_set').in_bulk()
+        body = renderer.render(serialize_customers([chunk[pk] for pk in chunk_ids if pk in chunk], request))[1:-1]
+        if body:
+            yield b',' + body if started else body
+            started = True
+    yield b']'
+
+
 class AdminCustomerAPIView(views.APIView):
     permission_classes = []
 
     def get(self, request, pk=None):
         if pk:
-            data = CustomerSerializer(Customer.objects.get(id=pk), context={'request': request}).data
+            customer = Customer.objects.select_related('user').prefetch_related('customeraccount_set').get(id=pk)
+            data = CustomerSerializer(customer, context={'request': request}).data
         else:
             search = request.GET.get("search")
             account_status = request.GET.get("account_status")
@@ -65,7 +101,15 @@ class AdminCustomerAPIView(views.APIView):
             else:
                 customers = Customer.objects.all().order_by('-created_on')
 
-            data = CustomerSerializer(customers, many=True, context={'request': request}).data
+            # ?page= returns one page, otherwise the full list is streamed in chunks
+            if 'page' in request.GET:
+                paginator = CustomPagination()
+                paginator.page_size = settings.ADMIN_LIST_PAGE_SIZE
+                customers = customers.select_related('user').prefetch_related('customeraccount_set')
+                page = paginator.paginate_queryset(customers, request)
+                return paginator.get_paginated_response(serialize_customers(page, request))
+
+            return StreamingHttpResponse(stream_customers(customers, request), content_type='application/json')
 
         return Response(data)
 
@@ -107,16 +151,17 @@ class AdminTransferAPIView(views.APIView, CustomPagination):
 
         if transfer_type == "local":
             query &= Q(transaction_option="cit_bank_transfer")
-            transfers = Transaction.objects.filter(query).order_by('-created_on').distinct()
         elif transfer_type == "others":
             query &= Q(transaction_option="other_bank_transfer")
-            transfers = Transaction.objects.filter(query).order_by('-created_on').distinct()
-            print(query)
-            print(transfers)
-        else:
-            transfers = Transaction.objects.filter(query).order_by('-created_on')
 
-        queryset = self.paginate_queryset(transfers, request)
+        transfers = Transaction.objects.filter(query).select_related('customer__user')
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination()
+            queryset = paginator.paginate_queryset(transfers, request)
+            serializer = TransactionSerializer(queryset, many=True).data
+            return Response(paginator.get_paginated_response(serializer).data)
+
+        queryset = self.paginate_queryset(transfers.order_by('-created_on', '-id'), request)
         serializer = TransactionSerializer(queryset, many=True).data
         data = self.get_paginated_response(serializer).data
 
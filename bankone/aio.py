@@ -0,0 +1,140 @@
+"""
+Coroutine versions of the bankone/api.py calls, for fanning out batches from scripts and jobs.
+
+Calls share one connection pool per event loop and at most BANK_ONE_ASYNC_MAX_CONCURRENCY of them are in
+flight on a loop at once, so a batch can be sent with asyncio.gather() without a thread per call.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bankone.api import (
+    CachedResponse, account_cache_key, auth_token, base_url, base_url_3ps, email_from, institution_code,
+    is_account_found, log_request, mfb_code, version
+)
+from bankone.client import AsyncPooledClient
+
+client = AsyncPooledClient(
+    "bankone", pool_size=settings.BANK_ONE_ASYNC_POOL_SIZE, pool_timeout=settings.BANK_ONE_POOL_TIMEOUT,
+    timeouts=settings.BANK_ONE_TIMEOUTS, max_concurrency=settings.BANK_ONE_ASYNC_MAX_CONCURRENCY
+)
+
+
+def pool_stats():
+    return client.stats()
+
+
+async def get_account_by_account_no(account_no):
+    url = f'{base_url}/Customer/GetByAccountNo/{version}'
+
+    payload = dict()
+    payload['authtoken'] = auth_token
+    payload['accountNumber'] = account_no
+
+    response = await client.request('GET', url, params=payload, endpoint='enquiry')
+    log_request('GET', url, payload, response.json(), response.status_code, label="bankone")
+    return response
+
+
+async def get_cached_account_by_account_no(account_no):
+    # Shares the cache entries of bankone.api.get_cached_account_by_account_no
+    data = await cache.aget(account_cache_key(account_no))
+    if data is not None:
+        return CachedResponse(200, data)
+
+    response = await get_account_by_account_no(account_no)
+    if is_account_found(response.status_code, response.json()):
+        await cache.aset(account_cache_key(account_no), response.json(), timeout=settings.ACCOUNT_ENQUIRY_CACHE_TTL)
+    return response
+
+
+async def get_details_by_customer_id(customer_id):
+    url = f'{base_url}/Account/GetAccountsByCustomerId/2?authtoken={auth_token}&customerId={customer_id}'
+
+    response = await client.request('GET', url, endpoint='enquiry')
+    log_request('GET', url, response=response.json(), status_code=response.status_code, label="bankone")
+    return response
+
+
+async def charge_customer(**kwargs):
+    url = f"{base_url_3ps}/CoreTransactions/LocalFundsTransfer"
+
+    amount = kwargs.get("amount") * 100
+
+    payload = dict()
+    payload['AuthenticationKey'] = auth_token
+    payload['Amount'] = amount
+    payload['FromAccountNumber'] = kwargs.get("account_no")
+    payload['ToAccountNumber'] = 1100303086
+    payload['RetrievalReference'] = kwargs.get("trans_ref")
+    payload['Narration'] = kwargs.get("description")
+
+    response = await client.request('POST', url, data=payload, endpoint='transfer')
+    log_request('POST', url, payload, response.json(), response.status_code, label="bankone")
+    return response
+
+
+async def log_reversal(tran_date, trans_ref):
+    url = f"{base_url_3ps}/CoreTransactions/Reversal"
+
+    payload = dict()
+    payload['Token'] = auth_token
+    payload['TransactionType'] = "LOCALFUNDTRANSFER"
+    payload['TransactionDate'] = str(tran_date)
+    payload['RetrievalReference'] = trans_ref
+
+    response = await client.request('POST', url, data=payload, endpoint='reversal')
+    result = response.json()
+    log_request('POST', url, payload, result, response.status_code, label="bankone")
+    return result
+
+
+async def send_sms(account_no, content, receiver):
+    return await send_bulk_sms([(account_no, content, receiver)])
+
+
+async def send_bulk_sms(messages):
+    # messages is a list of (account_no, content, receiver); SaveBulkSms accepts them in one request
+    url = f'{base_url}/Messaging/SaveBulkSms/{version}?authtoken={auth_token}&institutionCode={institution_code}'
+
+    payload = list()
+
+    for account_no, content, receiver in messages:
+        data = dict()
+
+        data['AccountNumber'] = account_no
+        data['To'] = receiver
+        data['AccountId'] = 0
+        data['Body'] = content
+        data['ReferenceNo'] = 'CIT-REF-'+str(uuid.uuid4().int)[:12]
+
+        payload.append(data)
+
+    response = await client.request('POST', url, json=payload, endpoint='messaging')
+    result = response.json()
+    log_request('POST', url, payload, result, response.status_code, label="bankone")
+    return result
+
+
+async def send_email(to, subject, body):
+    return await send_enquiry_email(email_from, to, subject, body)
+
+
+async def send_enquiry_email(mail_from, email_to, subject, body):
+    url = f'{base_url}/Messaging/SaveEmail/{version}'
+
+    data = dict()
+
+    data['institutionCode'] = institution_code
+    data['mfbCode'] = mfb_code
+    data['emailFrom'] = mail_from
+    data['emailTo'] = email_to
+    data['subject'] = subject
+    data['Message'] = body
+
+    response = await client.request('GET', url, params=data, endpoint='messaging')
+    result = response.json()
+
+    log_request('GET', url, data, result, response.status_code, label="bankone")
+    return result
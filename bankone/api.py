@@ -1,9 +1,12 @@
-import time
+import logging
+import random
 import uuid
 
-import requests
-import logging
 from django.conf import settings
+from django.core.cache import cache
+
+from bankone.client import PooledClient
+from citbank.log import LogPayload
 
 base_url = settings.BANK_ONE_BASE_URL
 base_url_3ps = settings.BANK_ONE_3PS_URL
@@ -13,10 +16,50 @@ institution_code = settings.CIT_INSTITUTION_CODE
 mfb_code = settings.CIT_MFB_CODE
 email_from = settings.CIT_EMAIL_FROM
 
+client = PooledClient(
+    "bankone", pool_size=settings.BANK_ONE_POOL_SIZE, pool_block=settings.BANK_ONE_POOL_BLOCK,
+    pool_timeout=settings.BANK_ONE_POOL_TIMEOUT, timeouts=settings.BANK_ONE_TIMEOUTS
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def is_failed_response(status_code, response):
+    if status_code is not None and status_code >= 400:
+        return True
+    if isinstance(response, dict):
+        return "error" in response or response.get("IsSuccessful") is False
+    return False
+
 
-def log_request(*args):
-    for arg in args:
-        logging.info(arg)
+def log_request(method, url, payload=None, response=None, status_code=None, headers=None, label="upstream"):
+    # Failures are always logged; successes only for a LOG_REQUEST_SAMPLE_RATE fraction of calls.
+    # Bodies are serialized, redacted and truncated by LogPayload when the record is written.
+    if is_failed_response(status_code, response):
+        level = logging.WARNING
+    elif random.random() < settings.LOG_REQUEST_SAMPLE_RATE:
+        level = logging.INFO
+    else:
+        return
+    if not logger.isEnabledFor(level):
+        return
+
+    # Short placeholder values (as in dev settings) would mask unrelated text
+    secrets = [secret for secret in (auth_token, settings.TM_CLIENT_ID) if secret and len(secret) >= 8]
+    max_length = settings.LOG_REQUEST_MAX_LENGTH
+    redact_keys = settings.LOG_REDACT_KEYS
+    logger.log(
+        level, "%s %s %s status=%s headers=%s payload=%s response=%s", label, method,
+        LogPayload(url, secrets=secrets), status_code,
+        LogPayload(headers, max_length, redact_keys, secrets),
+        LogPayload(payload, max_length, redact_keys, secrets),
+        LogPayload(response, max_length, redact_keys, secrets),
+    )
+
+
+def pool_stats():
+    return client.stats()
 
 
 def get_account_by_account_no(account_no):
@@ -26,16 +69,53 @@ def get_account_by_account_no(account_no):
     payload['authtoken'] = auth_token
     payload['accountNumber'] = account_no
 
-    response = requests.request('GET', url=url, params=payload)
-    log_request(url, payload, response.json())
+    response = client.request('GET', url=url, params=payload, endpoint='enquiry')
+    log_request('GET', url, payload, response.json(), response.status_code, label="bankone")
     return response
 
 
+class CachedResponse:
+    # Enough of requests.Response for callers of get_account_by_account_no
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def account_cache_key(account_no):
+    return f"bankone:account:{account_no}"
+
+
+def is_account_found(status_code, data):
+    # BankOne also answers failed lookups with HTTP 200, so the body has to show the account
+    if status_code != 200 or not isinstance(data, dict):
+        return False
+    return data.get("IsSuccessful") is not False and bool(data.get("CustomerDetails"))
+
+
+def get_cached_account_by_account_no(account_no):
+    # Only successful lookups are cached, for ACCOUNT_ENQUIRY_CACHE_TTL seconds
+    data = cache.get(account_cache_key(account_no))
+    if data is not None:
+        return CachedResponse(200, data)
+
+    response = get_account_by_account_no(account_no)
+    if is_account_found(response.status_code, response.json()):
+        cache.set(account_cache_key(account_no), response.json(), timeout=settings.ACCOUNT_ENQUIRY_CACHE_TTL)
+    return response
+
+
+def invalidate_account_cache(account_no):
+    cache.delete(account_cache_key(account_no))
+
+
 def get_details_by_customer_id(customer_id):
     url = f'{base_url}/Account/GetAccountsByCustomerId/2?authtoken={auth_token}&customerId={customer_id}'
 
-    response = requests.request('GET', url=url)
-    log_request(url, response.json())
+    response = client.request('GET', url=url, endpoint='enquiry')
+    log_request('GET', url, response=response.json(), status_code=response.status_code, label="bankone")
     return response
 
 
@@ -52,8 +132,8 @@ def charge_customer(**kwargs):
     payload['RetrievalReference'] = kwargs.get("trans_ref")
     payload['Narration'] = kwargs.get("description")
 
-    response = requests.request('POST', url=url, data=payload)
-    log_request(url, payload, response.json())
+    response = client.request('POST', url=url, data=payload, endpoint='transfer')
+    log_request('POST', url, payload, response.json(), response.status_code, label="bankone")
     return response
 
 
@@ -66,30 +146,37 @@ def log_reversal(tran_date, trans_ref):
     payload['TransactionDate'] = str(tran_date)
     payload['RetrievalReference'] = trans_ref
 
-    response = requests.request('POST', url=url, data=payload).json()
-    log_request(url, payload, response.json())
-    return response
+    response = client.request('POST', url=url, data=payload, endpoint='reversal')
+    result = response.json()
+    log_request('POST', url, payload, result, response.status_code, label="bankone")
+    return result
 
 
 def send_sms(account_no, content, receiver):
+    return send_bulk_sms([(account_no, content, receiver)])
+
+
+def send_bulk_sms(messages):
+    # messages is a list of (account_no, content, receiver); SaveBulkSms accepts them in one request
     url = f'{base_url}/Messaging/SaveBulkSms/{version}?authtoken={auth_token}&institutionCode={institution_code}'
-    ref = 'CIT-REF-'+str(uuid.uuid4().int)[:12]
 
     payload = list()
 
-    data = dict()
+    for account_no, content, receiver in messages:
+        data = dict()
 
-    data['AccountNumber'] = account_no
-    data['To'] = receiver
-    data['AccountId'] = 0
-    data['Body'] = content
-    data['ReferenceNo'] = ref
+        data['AccountNumber'] = account_no
+        data['To'] = receiver
+        data['AccountId'] = 0
+        data['Body'] = content
+        data['ReferenceNo'] = 'CIT-REF-'+str(uuid.uuid4().int)[:12]
 
-    payload.append(data)
+        payload.append(data)
 
-    response = requests.request('POST', url=url, json=payload).json()
-    log_request(url, payload, response)
-    return response
+    response = client.request('POST', url=url, json=payload, endpoint='messaging')
+    result = response.json()
+    log_request('POST', url, payload, result, response.status_code, label="bankone")
+    return result
 
 
 def send_email(to, subject, body):
@@ -104,10 +191,11 @@ def send_email(to, subject, body):
     data['subject'] = subject
     data['Message'] = body
 
-    response = requests.request('GET', url, params=data).json()
+    response = client.request('GET', url, params=data, endpoint='messaging')
+    result = response.json()
 
-    log_request(url, data, response)
-    return response
+    log_request('GET', url, data, result, response.status_code, label="bankone")
+    return result
 
 
 def send_enquiry_email(mail_from, email_to, subject, body):
@@ -122,10 +210,11 @@ def send_enquiry_email(mail_from, email_to, subject, body):
     data['subject'] = subject
     data['Message'] = body
 
-    response = requests.request('GET', url, params=data).json()
+    response = client.request('GET', url, params=data, endpoint='messaging')
+    result = response.json()
 
-    log_request(url, data, response)
-    return response
+    log_request('GET', url, data, result, response.status_code, label="bankone")
+    return result
 
 # def send_email_temporal_fix(to, body, subject):
 #     from django.core.mail import send_mail
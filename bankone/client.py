@@ -0,0 +1,358 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+DEFAULT_TIMEOUT = (5, 30)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class PoolStats:
+    """Thread-safe counters describing how a client's connection pool is used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+            self.wait_count = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+                "pool_wait_total_ms": round(self.wait_total * 1000, 3),
+                "pool_wait_avg_ms": round(self.wait_total * 1000 / self.wait_count, 3) if self.wait_count else 0.0,
+                "pool_wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are reported as bucket upper bounds."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.errors = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+
+    def record(self, seconds, error=False):
+        elapsed = seconds * 1000
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if elapsed <= bound:
+                index = position
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.errors += int(error)
+            self.total_ms += elapsed
+            self.max_ms = max(self.max_ms, elapsed)
+
+    def _percentile(self, fraction):
+        target = fraction * self.count
+        seen = 0
+        for position, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.buckets[position] if position < len(self.buckets) else round(self.max_ms, 3)
+        return 0.0
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"le_{bound}" for bound in self.buckets] + ["le_inf"]
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max_ms, 3),
+                "p50_ms": self._percentile(0.50),
+                "p95_ms": self._percentile(0.95),
+                "p99_ms": self._percentile(0.99),
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+class RateLimiter:
+    """Token bucket shared by every thread of a worker pool; wait() blocks until a call is allowed."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(self.rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+def _instrumented_pool_class(base, stats, pool_timeout):
+    class InstrumentedPool(base):
+        def _get_conn(self, timeout=None):
+            start = time.monotonic()
+            try:
+                return super()._get_conn(timeout=pool_timeout if timeout is None else timeout)
+            finally:
+                stats.record_wait(time.monotonic() - start)
+
+        def _new_conn(self):
+            stats.record_new_connection()
+            return super()._new_conn()
+
+    return InstrumentedPool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose urllib3 pools report connection reuse and checkout wait times."""
+
+    def __init__(self, stats, pool_timeout=None, **kwargs):
+        self.stats = stats
+        self.pool_timeout = pool_timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _instrumented_pool_class(HTTPConnectionPool, self.stats, self.pool_timeout),
+            "https": _instrumented_pool_class(HTTPSConnectionPool, self.stats, self.pool_timeout),
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super().send(request, **kwargs)
+
+
+class PooledClient:
+    """
+    Keep-alive HTTP client shared by every call to one upstream.
+
+    The underlying session is created lazily and per process, so gunicorn workers
+    forked from a preloaded master never share sockets.
+    """
+
+    def __init__(self, name, pool_size=10, pool_block=False, pool_timeout=None, timeouts=None, headers=None):
+        self.name = name
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.pool_timeout = pool_timeout
+        self.timeouts = dict(timeouts or {})
+        self.headers = dict(headers or {})
+        self._stats = PoolStats()
+        self._histograms = dict()
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = PooledAdapter(
+            self._stats, pool_timeout=self.pool_timeout, pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size, pool_block=self.pool_block
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        session.headers.update(self.headers)
+        return session
+
+    def get_timeout(self, endpoint):
+        return self.timeouts.get(endpoint) or self.timeouts.get("default") or DEFAULT_TIMEOUT
+
+    def get_histogram(self, endpoint):
+        histogram = self._histograms.get(endpoint)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(endpoint, LatencyHistogram())
+        return histogram
+
+    def request(self, method, url, endpoint="default", **kwargs):
+        kwargs.setdefault("timeout", self.get_timeout(endpoint))
+        start = time.monotonic()
+        error = True
+        try:
+            response = self.session.request(method, url, **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            self.get_histogram(endpoint).record(time.monotonic() - start, error=error)
+
+    def latency_stats(self):
+        return {endpoint: histogram.snapshot() for endpoint, histogram in list(self._histograms.items())}
+
+    def stats(self):
+        data = self._stats.snapshot()
+        data["client"] = self.name
+        data["pool_size"] = self.pool_size
+        data["latency"] = self.latency_stats()
+        return data
+
+    def reset_stats(self):
+        self._stats.reset()
+        for histogram in list(self._histograms.values()):
+            histogram.reset()
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+
+class AsyncPooledClient:
+    """
+    httpx counterpart of PooledClient for coroutine code.
+
+    An httpx.AsyncClient is bound to the event loop that opened its connections, so each running loop
+    gets its own client, e.g. one per asyncio.run() or async_to_sync call.
+    With max_concurrency, calls beyond that many in flight on a loop wait for a slot instead of failing
+    with a pool timeout, so callers can gather() large batches.
+    """
+
+    def __init__(self, name, pool_size=10, pool_timeout=None, timeouts=None, headers=None, max_concurrency=None):
+        self.name = name
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.timeouts = dict(timeouts or {})
+        self.headers = dict(headers or {})
+        self.max_concurrency = max_concurrency
+        self._clients = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._histograms = dict()
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = self._build_client()
+        return client
+
+    @property
+    def semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _build_client(self):
+        limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        return httpx.AsyncClient(limits=limits, headers=self.headers)
+
+    def get_timeout(self, endpoint):
+        connect, read = self.timeouts.get(endpoint) or self.timeouts.get("default") or DEFAULT_TIMEOUT
+        return httpx.Timeout(read, connect=connect, pool=self.pool_timeout)
+
+    def get_histogram(self, endpoint):
+        histogram = self._histograms.get(endpoint)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(endpoint, LatencyHistogram())
+        return histogram
+
+    async def request(self, method, url, endpoint="default", **kwargs):
+        kwargs.setdefault("timeout", self.get_timeout(endpoint))
+        if isinstance(kwargs.get("data"), dict):
+            # requests sends booleans in form bodies as True/False, httpx as true/false
+            kwargs["data"] = {
+                key: str(value) if isinstance(value, bool) else value for key, value in kwargs["data"].items()
+            }
+        elif isinstance(kwargs.get("data"), str):
+            kwargs["content"] = kwargs.pop("data")
+
+        if self.max_concurrency:
+            async with self.semaphore:
+                return await self._request(method, url, endpoint, **kwargs)
+        return await self._request(method, url, endpoint, **kwargs)
+
+    async def _request(self, method, url, endpoint, **kwargs):
+        self._requests += 1
+        start = time.monotonic()
+        error = True
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            error = response.status_code >= 500
+            return response
+        finally:
+            self.get_histogram(endpoint).record(time.monotonic() - start, error=error)
+
+    def latency_stats(self):
+        return {endpoint: histogram.snapshot() for endpoint, histogram in list(self._histograms.items())}
+
+    def stats(self):
+        return {
+            "client": self.name, "pool_size": self.pool_size, "max_concurrency": self.max_concurrency,
+            "requests": self._requests,
+            "event_loops": len(self._clients), "latency": self.latency_stats(),
+        }
+
+    def reset_stats(self):
+        self._requests = 0
+        for histogram in list(self._histograms.values()):
+            histogram.reset()
+
+    async def aclose(self):
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
@@ -1,49 +1,188 @@
-from threading import Thread
+import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from django.conf import settings
 from django.db.models import Q
+from django.db.transaction import atomic
+from django.utils import timezone
 
-from bankone.api import send_sms, log_reversal
+from bankone.api import log_reversal
+from bankone.client import RateLimiter
 from billpayment.models import Electricity, BillPaymentReversal
+from notification.utils import queue_sms
 from tm_saas.api import retry_electricity
+from tm_saas.cache import warm_catalogs_in_background
 
+logger = logging.getLogger(__name__)
 
-def retry_eko_elect_cron():
-    elect = Q(disco_type="EKEDC_PREPAID")
-    elect |= Q(disco_type="EKEDC_POSTPAID")
-    queryset = Electricity.objects.filter(elect, status="pending").distinct()
-
-    # PERFORM VEND RETRY
-    for query in queryset:
-        trans_id = query.transaction_id
-        response = retry_electricity(trans_id)
-        if response["data"]:
-            if response["data"]["status"]:
-                if response["data"]["status"] == "ACCEPTED":
-                    token = response["data"]["standardTokenValue"]
-                    # UPDATE QUERY
-                    query.status = "success"
-                    query.token = token
-                    query.save()
-                    # SEND TOKEN
-                    content = f"Your EKEDC PREPAID token is: {token}"
-                    Thread(target=send_sms, args=[query.account_no, content, query.phone_number]).start()
+
+def get_vend_token(data):
+    provider_response = data.get("providerResponse") or {}
+    for token in (data.get("standardTokenValue"), data.get("token"), data.get("creditToken"),
+                  provider_response.get("token"), provider_response.get("creditToken")):
+        if token:
+            return token
+    return None
+
+
+def retry_electricity_vend(query, limiter):
+    limiter.wait()
+    try:
+        response = retry_electricity(query.transaction_id, query.disco_type)
+        data = response.get("data") or {}
+        accepted = data.get("status") == "ACCEPTED"
+        token = get_vend_token(data) if accepted else None
+    except Exception as ex:
+        logger.warning("Electricity retry for %s failed: %s", query.transaction_id, ex)
+        accepted, token = False, None
+
+    query.attempt_count += 1
+    if accepted:
+        query.status = "success"
+        query.token = token
+        query.next_attempt_at = None
+        return True
+
+    delay = min(settings.ELECTRICITY_RETRY_DELAY * 2 ** (query.attempt_count - 1), settings.ELECTRICITY_RETRY_MAX_DELAY)
+    query.next_attempt_at = timezone.now() + datetime.timedelta(seconds=delay)
+    return False
+
+
+def claim_electricity_vends(discos, attempted, batch_size):
+    # Claimed rows get next_attempt_at pushed ahead, so other runners skip them while TM is called without a lock
+    now = timezone.now()
+    oldest = now - datetime.timedelta(seconds=settings.ELECTRICITY_RETRY_MAX_AGE)
+    due = Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+    with atomic():
+        batch = list(
+            Electricity.objects.select_for_update(skip_locked=True).filter(
+                due, status="pending", disco_type__in=discos, created_on__gte=oldest
+            ).exclude(id__in=attempted).order_by("created_on")[:batch_size]
+        )
+        claimed_until = now + datetime.timedelta(seconds=settings.ELECTRICITY_RETRY_CLAIM_TIMEOUT)
+        Electricity.objects.filter(id__in=[query.id for query in batch]).update(next_attempt_at=claimed_until)
+    return batch
+
+
+def save_electricity_vend(query, success):
+    query.save(update_fields=["status", "token", "attempt_count", "next_attempt_at"])
+
+    # The vend is recorded first, so a failure to queue the token SMS cannot undo it
+    if success and query.token:
+        # SEND TOKEN
+        content = f"Your {query.disco_type} token is: {query.token}".replace("_", " ")
+        with atomic():
+            queue_sms(query.account_no, content, query.phone_number)
+            Electricity.objects.filter(id=query.id).update(token_sent=True)
+
+
+def retry_electricity_cron(discos=None):
+    # Pending vends are retried with exponential backoff per row until they are older than
+    # ELECTRICITY_RETRY_MAX_AGE. Batches are claimed in a short transaction, vended outside it and
+    # saved row by row as TM answers.
+    discos = discos or settings.ELECTRICITY_RETRY_DISCOS
+    batch_size = settings.ELECTRICITY_RETRY_BATCH_SIZE
+    limiter = RateLimiter(settings.ELECTRICITY_RETRY_RATE_LIMIT)
+    attempted, vended = set(), 0
+
+    with ThreadPoolExecutor(max_workers=settings.ELECTRICITY_RETRY_WORKERS) as executor:
+        while True:
+            batch = claim_electricity_vends(discos, attempted, batch_size)
+            if not batch:
+                break
+            attempted.update(query.id for query in batch)
+
+            futures = {executor.submit(retry_electricity_vend, query, limiter): query for query in batch}
+            for future in as_completed(futures):
+                query, success = futures[future], future.result()
+                try:
+                    save_electricity_vend(query, success)
+                except Exception as ex:
+                    logger.error("Electricity retry for %s could not be recorded: %s", query.transaction_id, ex)
+                    continue
+                vended += success
+
+    logger.info("Electricity retry: %s of %s pending vends completed", vended, len(attempted))
     return "Elect Retry Cron ran successfully"
 
 
+def reverse_bill_payment(query, limiter):
+    # True when BankOne accepted the reversal, False when it declined, None when the outcome is unknown
+    limiter.wait()
+    try:
+        response = log_reversal(query.transaction_date, query.transaction_reference)
+        successful = response.get("IsSuccessful") is True and response.get("ResponseCode") == "00"
+        reference = response.get("Reference")
+    except Exception as ex:
+        logger.warning("Reversal for %s failed: %s", query.transaction_reference, ex)
+        return None
+
+    if not successful:
+        logger.warning("Reversal for %s declined: %s", query.transaction_reference, response)
+        return False
+
+    query.status = "completed"
+    query.ref = reference
+    query.updated_on = timezone.now()
+    return True
+
+
+def claim_reversals(attempted, batch_size):
+    # Claimed rows are skipped by other runners until claimed_until passes, so no lock is held during BankOne calls
+    now = timezone.now()
+    with atomic():
+        batch = list(
+            BillPaymentReversal.objects.select_for_update(skip_locked=True).filter(
+                Q(claimed_until__isnull=True) | Q(claimed_until__lte=now), status="pending"
+            ).exclude(id__in=attempted).order_by("created_on")[:batch_size]
+        )
+        claimed_until = now + datetime.timedelta(seconds=settings.BILL_REVERSAL_CLAIM_TIMEOUT)
+        BillPaymentReversal.objects.filter(id__in=[query.id for query in batch]).update(claimed_until=claimed_until)
+    return batch
+
+
+def save_reversal(query, success):
+    if success:
+        query.claimed_until = None
+        query.save(update_fields=["status", "ref", "updated_on", "claimed_until"])
+    elif success is False:
+        # DECLINED, RETRY ON THE NEXT RUN
+        BillPaymentReversal.objects.filter(id=query.id).update(claimed_until=None)
+    # An unknown outcome keeps the claim, so the row is only retried once it expires
+
+
 def bill_payment_reversal_cron():
-    queryset = BillPaymentReversal.objects.filter(status="pending")
+    # Batches are claimed in a short transaction, reversed outside it and saved row by row, so a failure
+    # part way through cannot undo the record of reversals BankOne has already accepted.
+    batch_size = settings.BILL_REVERSAL_BATCH_SIZE
+    limiter = RateLimiter(settings.BILL_REVERSAL_RATE_LIMIT)
+    attempted, completed = set(), 0
 
-    for query in queryset:
-        trans_date = query.transaction_date
-        trans_ref = query.transaction_reference
-        response = log_reversal(trans_date, trans_ref)
+    with ThreadPoolExecutor(max_workers=settings.BILL_REVERSAL_WORKERS) as executor:
+        while True:
+            batch = claim_reversals(attempted, batch_size)
+            if not batch:
+                break
+            attempted.update(query.id for query in batch)
 
-        if response["IsSuccessful"] is True and response["ResponseCode"] == "00":
-            ref_no = response["Reference"]
-            query.status = "completed"
-            query.ref = ref_no
-            query.save()
+            futures = {executor.submit(reverse_bill_payment, query, limiter): query for query in batch}
+            for future in as_completed(futures):
+                query, success = futures[future], future.result()
+                try:
+                    save_reversal(query, success)
+                except Exception as ex:
+                    logger.error("Reversal for %s could not be saved: %s", query.transaction_reference, ex)
+                    continue
+                completed += bool(success)
 
+    logger.info("Bill payment reversal: %s of %s pending reversals completed", completed, len(attempted))
     return "Bill Payment Reversal Cron ran successfully"
 
 
+def warm_catalog_cron():
+    if not warm_catalogs_in_background():
+        return "Catalog Warm Cron is already running"
+    return "Catalog Warm Cron started successfully"
+
+
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.3 on 2026-10-18 16:19
+
+from django.db import migrations, models
+
+from citbank.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # AddIndexConcurrently must run outside a transaction
+    atomic = False
+
+    dependencies = [
+        ('billpayment', '0009_alter_billpaymentreversal_status'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='billpaymentreversal',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_on'], name='reversal_pending_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='electricity',
+            index=models.Index(fields=['disco_type', 'status'], name='electricity_disco_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='electricity',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['disco_type', 'created_on'], name='electricity_pending_idx'),
+        ),
+    ]
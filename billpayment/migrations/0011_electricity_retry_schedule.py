@@ -0,0 +1,23 @@
+# Generated by Django 4.0.3 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billpayment', '0010_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='electricity',
+            name='attempt_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='electricity',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
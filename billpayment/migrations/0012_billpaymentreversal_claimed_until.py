@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-18 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billpayment', '0011_electricity_retry_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billpaymentreversal',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
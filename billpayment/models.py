@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 
 REVERSAL_STATUS = (
     ("completed", "Completed"), ("pending", "Pending")
@@ -66,8 +67,18 @@ class Electricity(models.Model):
     reference = models.CharField(max_length=100, blank=True, null=True)
     bill_id = models.CharField(max_length=100, blank=True, null=True)
     token_sent = models.BooleanField(default=False)
+    attempt_count = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
     created_on = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['disco_type', 'status'], name='electricity_disco_status_idx'),
+            models.Index(
+                fields=['disco_type', 'created_on'], name='electricity_pending_idx', condition=Q(status='pending')
+            ),
+        ]
+
     def __str__(self):
         return f"{self.account_no}, {self.disco_type} -----> {self.meter_number} - {self.amount}"
 
@@ -78,8 +89,14 @@ class BillPaymentReversal(models.Model):
     payment_type = models.CharField(max_length=50, default="airtime")
     status = models.CharField(max_length=50, choices=REVERSAL_STATUS, default="pending")
     ref = models.CharField(max_length=100, blank=True, null=True)
+    claimed_until = models.DateTimeField(blank=True, null=True)
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_on'], name='reversal_pending_idx', condition=Q(status='pending')),
+        ]
+
     def __str__(self):
         return f"{self.transaction_date} - {self.transaction_reference}, {self.status}"
@@ -1,3 +1,153 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from account.tests import create_customer
+from account.utils import encrypt_text
+from billpayment.cron import bill_payment_reversal_cron, retry_electricity_cron
+from billpayment.models import BillPaymentReversal, Electricity
+from notification.models import OutboundMessage
+
+
+@override_settings(BILL_REVERSAL_RATE_LIMIT=0, BILL_REVERSAL_BATCH_SIZE=2)
+class BillPaymentReversalCronTest(TestCase):
+
+    def setUp(self):
+        for reference in ["CIT-OK", "CIT-BAD", "CIT-NO", "CIT-ERR"]:
+            BillPaymentReversal.objects.create(transaction_date="2026-10-18", transaction_reference=reference)
+
+    def reply(self, tran_date, trans_ref):
+        if trans_ref == "CIT-ERR":
+            raise ConnectionError("timed out")
+        return {
+            "CIT-OK": {"IsSuccessful": True, "ResponseCode": "00", "Reference": "R1"},
+            "CIT-BAD": ["unexpected"],
+            "CIT-NO": {"IsSuccessful": False, "ResponseCode": "06"},
+        }[trans_ref]
+
+    def test_each_reversal_is_saved_on_its_own(self):
+        with mock.patch("billpayment.cron.log_reversal", side_effect=self.reply):
+            bill_payment_reversal_cron()
+
+        reversals = {reversal.transaction_reference: reversal for reversal in BillPaymentReversal.objects.all()}
+        self.assertEqual(reversals["CIT-OK"].status, "completed")
+        self.assertEqual(reversals["CIT-OK"].ref, "R1")
+        self.assertIsNone(reversals["CIT-OK"].claimed_until)
+
+        # Declined rows are released for the next run; unknown outcomes keep their claim until it expires
+        for reference in ["CIT-BAD", "CIT-NO", "CIT-ERR"]:
+            self.assertEqual(reversals[reference].status, "pending")
+        self.assertIsNone(reversals["CIT-NO"].claimed_until)
+        self.assertIsNotNone(reversals["CIT-ERR"].claimed_until)
+
+    def test_claimed_rows_are_skipped(self):
+        with mock.patch("billpayment.cron.log_reversal", side_effect=self.reply):
+            bill_payment_reversal_cron()
+        with mock.patch("billpayment.cron.log_reversal", side_effect=self.reply) as reversal:
+            bill_payment_reversal_cron()
+
+        self.assertNotIn("CIT-ERR", [call.args[1] for call in reversal.call_args_list])
+        self.assertNotIn("CIT-OK", [call.args[1] for call in reversal.call_args_list])
+
+
+class CronPermissionTest(TestCase):
+
+    @override_settings(CRON_SECRET="cron-secret")
+    def test_retry_and_reversal_crons_need_the_secret(self):
+        with mock.patch("billpayment.views.retry_electricity_cron", return_value="done"), \
+                mock.patch("billpayment.views.bill_payment_reversal_cron", return_value="done"):
+            for url in ["/bills/retry-elect/", "/bills/bill-reversal/"]:
+                self.assertEqual(self.client.get(url).status_code, 401)
+                self.assertEqual(self.client.get(url, HTTP_X_CRON_SECRET="wrong").status_code, 401)
+                self.assertEqual(self.client.get(url, HTTP_X_CRON_SECRET="cron-secret").status_code, 200)
+
+
+@override_settings(ELECTRICITY_RETRY_RATE_LIMIT=0, ELECTRICITY_RETRY_BATCH_SIZE=2)
+class RetryElectricityCronTest(TestCase):
+
+    def setUp(self):
+        for transaction_id in ["TM-OK", "TM-BAD", "TM-ERR"]:
+            Electricity.objects.create(
+                account_no="0000000001", disco_type="EKEDC_PREPAID", meter_number="123", phone_number="0800",
+                transaction_id=transaction_id
+            )
+
+    def reply(self, transaction_id, disco):
+        if transaction_id == "TM-ERR":
+            raise ConnectionError("timed out")
+        return {
+            "TM-OK": {"data": {"status": "ACCEPTED", "token": "1234-5678"}},
+            "TM-BAD": {"data": "unexpected"},
+        }[transaction_id]
+
+    def test_each_vend_is_saved_on_its_own(self):
+        with mock.patch("billpayment.cron.retry_electricity", side_effect=self.reply):
+            retry_electricity_cron()
+
+        vends = {vend.transaction_id: vend for vend in Electricity.objects.all()}
+        self.assertEqual(vends["TM-OK"].status, "success")
+        self.assertEqual(vends["TM-OK"].token, "1234-5678")
+        self.assertTrue(vends["TM-OK"].token_sent)
+        self.assertIsNone(vends["TM-OK"].next_attempt_at)
+        for transaction_id in ["TM-BAD", "TM-ERR"]:
+            self.assertEqual(vends[transaction_id].status, "pending")
+            self.assertEqual(vends[transaction_id].attempt_count, 1)
+            self.assertIsNotNone(vends[transaction_id].next_attempt_at)
+        self.assertEqual(OutboundMessage.objects.count(), 1)
+
+    def test_vend_is_kept_when_the_token_sms_fails(self):
+        with mock.patch("billpayment.cron.retry_electricity", side_effect=self.reply), \
+                mock.patch("billpayment.cron.queue_sms", side_effect=RuntimeError("outbox down")):
+            retry_electricity_cron()
+
+        vend = Electricity.objects.get(transaction_id="TM-OK")
+        self.assertEqual(vend.status, "success")
+        self.assertFalse(vend.token_sent)
+
+
+class BillPaymentViewTest(TestCase):
+    charged = (True, {"IsSuccessful": True, "ResponseCode": "00"})
+
+    def setUp(self):
+        customer = create_customer("bill_payer")
+        customer.transaction_pin = encrypt_text("1234")
+        customer.save()
+        self.account_no = customer.customeraccount_set.get().account_no
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(customer.user)}"}
+
+    def post(self, url, data):
+        data = dict(data, account_no=self.account_no, transaction_pin="1234")
+        return self.client.post(url, data, content_type="application/json", **self.auth)
+
+    def test_data_plan_is_checked_before_the_charge(self):
+        data = {"phone_number": "08012345678", "network": "mtn", "amount": "100", "purchase_type": "data"}
+        with mock.patch("billpayment.views.check_balance_and_charge", return_value=self.charged) as charge:
+            response = self.post("/bills/recharge/", data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "Please select a plan to continue")
+        charge.assert_not_called()
+
+    def test_failed_cable_tv_subscription_is_reported(self):
+        data = {
+            "service_name": "DSTV", "smart_card_no": "123", "customer_name": "Ada", "phone_number": "0800",
+            "product_codes": ["P1"], "duration": "1", "amount": "1000"
+        }
+        with mock.patch("billpayment.views.check_balance_and_charge", return_value=self.charged), \
+                mock.patch("billpayment.views.cable_tv_sub", return_value={"error": "failed"}):
+            response = self.post("/bills/cable/", data)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(BillPaymentReversal.objects.get().payment_type, "cableTv")
+
+    @override_settings(SERVICE_CHARGE="50")
+    def test_vend_amount_excludes_the_service_charge(self):
+        data = {"disco_type": "EKEDC_PREPAID", "meter_no": "123", "amount": "1000", "phone_no": "0800"}
+        with mock.patch("billpayment.views.check_balance_and_charge", return_value=self.charged) as charge, \
+                mock.patch("billpayment.views.vend_electricity", return_value=(True, "done", "1234")) as vend:
+            response = self.post("/bills/electricity/", data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(charge.call_args.args[2], 1050)
+        self.assertEqual(vend.call_args.args[3], 1000)
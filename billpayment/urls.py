@@ -14,4 +14,5 @@ urlpatterns = [
     # CRON-JOBS
     path('retry-elect/', views.RetryElectricityCronView.as_view(), name="retry-elect"),
     path('bill-reversal/', views.BillPaymentReversalCronView.as_view(), name="bill-reversal"),
+    path('warm-catalog/', views.WarmCatalogCronView.as_view(), name="warm-catalog"),
 ]
@@ -1,36 +1,66 @@
-from threading import Thread
+from django.conf import settings
+from django.core.cache import cache
 
 from account.models import CustomerAccount
-from bankone.api import get_details_by_customer_id, charge_customer, send_sms
+from account.utils import mark_idempotency_key_charged
+from bankone.api import get_details_by_customer_id, charge_customer
 from billpayment.models import Electricity
+from notification.utils import queue_sms
 from tm_saas.api import validate_meter_no, electricity
 
 
-def check_balance_and_charge(user, account_no, amount, ref_code, narration):
-    # CONFIRM CUSTOMER OWNS THE ACCOUNT
-    if not CustomerAccount.objects.filter(customer__user=user, active=True, account_no=account_no).exists():
-        return False, "Account not found"
+def balance_cache_key(account_no):
+    return f"bankone:balance:{account_no}"
+
+
+def get_account_balance(customer_id, account_no, refresh=False):
+    key = balance_cache_key(account_no)
+    balance = None if refresh else cache.get(key)
+    if balance is not None:
+        return balance
 
-    # CHECK ACCOUNT BALANCE
-    customer_id = CustomerAccount.objects.get(
-        customer__user=user, active=True, account_no=account_no
-    ).customer.customerID
     response = get_details_by_customer_id(customer_id).json()
 
     balance = 0
     accounts = response["Accounts"]
     for account in accounts:
         if account["NUBAN"] == str(account_no):
-            balance = str(account["withdrawableAmount"]).replace(",", "")
+            balance = float(str(account["withdrawableAmount"]).replace(",", ""))
+
+    cache.set(key, balance, timeout=settings.BILL_PAYMENT_BALANCE_TTL)
+    return balance
+
+
+def invalidate_account_balance(account_no):
+    cache.delete(balance_cache_key(account_no))
+
+
+def check_balance_and_charge(user, account_no, amount, ref_code, narration):
+    # CONFIRM CUSTOMER OWNS THE ACCOUNT
+    account = CustomerAccount.objects.select_related("customer").filter(
+        customer__user=user, active=True, account_no=account_no
+    ).first()
+    if account is None:
+        return False, "Account not found"
+
+    # CHECK ACCOUNT BALANCE
+    # Optional: BankOne already declines insufficient funds with ResponseCode 51
+    if settings.BILL_PAYMENT_BALANCE_PRECHECK:
+        balance = get_account_balance(account.customer.customerID, account_no)
+        if float(amount) > balance:
+            # A stale cached balance should not block the payment
+            balance = get_account_balance(account.customer.customerID, account_no, refresh=True)
 
-    if float(balance) <= 0:
-        return False, "Insufficient balance"
+        if balance <= 0:
+            return False, "Insufficient balance"
 
-    if float(amount) > float(balance):
-        return False, "Amount cannot be greater than current balance"
+        if float(amount) > balance:
+            return False, "Amount cannot be greater than current balance"
 
     # CHARGE CUSTOMER ACCOUNT
+    mark_idempotency_key_charged()
     response = charge_customer(account_no=account_no, amount=amount, trans_ref=ref_code, description=narration)
+    invalidate_account_balance(account_no)
     response = response.json()
 
     return True, response
@@ -142,7 +172,7 @@ def vend_electricity(account_no, disco_type, meter_no, amount, phone_number, ref
     if not token == "":
         # SEND TOKEN TO PHONE NUMBER
         content = f"Your {disco_type} token is: {token}".replace("_", " ")
-        Thread(target=send_sms, args=[account_no, content, phone_number]).start()
+        queue_sms(account_no, content, phone_number)
         elect.token_sent = True
         elect.save()
 
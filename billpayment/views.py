@@ -1,20 +1,19 @@
 import datetime
 import decimal
 import uuid
-from threading import Thread
 
 from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from account.models import Customer, CustomerAccount
-from account.utils import confirm_trans_pin
-from billpayment.cron import retry_eko_elect_cron, bill_payment_reversal_cron
+from account.utils import confirm_trans_pin, idempotent
+from billpayment.cron import retry_electricity_cron, bill_payment_reversal_cron, warm_catalog_cron
 from billpayment.models import Airtime, Data, CableTV, BillPaymentReversal
 from billpayment.utils import check_balance_and_charge, vend_electricity
-from tm_saas.api import get_networks, get_data_plan, purchase_airtime, purchase_data, get_services, \
-    get_service_products, validate_scn, cable_tv_sub, validate_meter_no, get_discos
+from citbank.permissions import IsAdminOrCronSecret
+from tm_saas.api import purchase_airtime, purchase_data, validate_scn, cable_tv_sub, validate_meter_no
+from tm_saas.cache import get_networks, get_data_plan, get_services, get_service_products, get_discos
 
 
 class GetNetworksAPIView(APIView):
@@ -47,6 +46,7 @@ class GetNetworksAPIView(APIView):
 
 class AirtimeDataPurchaseAPIView(APIView):
 
+    @idempotent
     def post(self, request):
 
         phone_number = request.data.get("phone_number")
@@ -61,6 +61,11 @@ class AirtimeDataPurchaseAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # CHECKED BEFORE THE CUSTOMER IS CHARGED
+        plan_id = request.data.get("plan_id")
+        if purchase_type == "data" and not plan_id:
+            return Response({"detail": "Please select a plan to continue"}, status=status.HTTP_400_BAD_REQUEST)
+
         success, response = confirm_trans_pin(request)
         if success is False:
             return Response({"detail": response}, status=status.HTTP_400_BAD_REQUEST)
@@ -103,9 +108,6 @@ class AirtimeDataPurchaseAPIView(APIView):
                     )
 
             if purchase_type == "data":
-                plan_id = request.data.get("plan_id")
-                if not plan_id:
-                    return Response({"detail": "Please select a plan to continue"}, status=status.HTTP_400_BAD_REQUEST)
                 response = purchase_data(plan_id=plan_id, phone_number=phone_number, network=network, amount=amount)
 
                 if "error" in response:
@@ -170,6 +172,7 @@ class CableTVAPIView(APIView):
                 data = response["data"]["billers"]
         return Response({"detail": data})
 
+    @idempotent
     def post(self, request):
 
         account_no = request.data.get("account_no")
@@ -208,7 +211,7 @@ class CableTVAPIView(APIView):
         if response["IsSuccessful"] is True and response["ResponseCode"] == "00":
 
             # remove service charge from amount
-            amount -= 100
+            amount -= decimal.Decimal(settings.SERVICE_CHARGE)
 
             response = cable_tv_sub(
                 service_name=service_name, duration=duration, customer_number=phone_number,
@@ -222,7 +225,7 @@ class CableTVAPIView(APIView):
                     transaction_reference=ref_code, transaction_date=str(date_today), payment_type="cableTv"
                 )
 
-                Response(
+                return Response(
                     {"detail": "An error has occurred, please try again later"}, status=status.HTTP_400_BAD_REQUEST
                 )
 
@@ -299,6 +302,7 @@ class ElectricityAPIView(APIView):
 
         return Response(data)
 
+    @idempotent
     def post(self, request):
 
         disco_type = request.data.get("disco_type")
@@ -332,7 +336,7 @@ class ElectricityAPIView(APIView):
         if response["IsSuccessful"] is True and response["ResponseCode"] == "00":
 
             # remove service charge from amount
-            amount -= 100
+            amount -= decimal.Decimal(settings.SERVICE_CHARGE)
 
             success, detail, token = vend_electricity(account_no, disco_type, meter_no, amount, phone_number, ref_code)
             if success is False:
@@ -358,18 +362,26 @@ class ElectricityAPIView(APIView):
 
 
 class RetryElectricityCronView(APIView):
-    permission_classes = []
+    permission_classes = [IsAdminOrCronSecret]
 
     def get(self, request):
-        response = retry_eko_elect_cron()
+        response = retry_electricity_cron()
         return Response({"detail": response})
 
 
 class BillPaymentReversalCronView(APIView):
-    permission_classes = []
+    permission_classes = [IsAdminOrCronSecret]
 
     def get(self, request):
         response = bill_payment_reversal_cron()
         return Response({"detail": response})
 
 
+class WarmCatalogCronView(APIView):
+    permission_classes = [IsAdminOrCronSecret]
+
+    def get(self, request):
+        response = warm_catalog_cron()
+        return Response({"detail": response})
+
+
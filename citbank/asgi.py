@@ -10,7 +10,13 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from decouple import config
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'citbank.settings')
+# Check If Environment is Production or Development
+
+if config('env', '') == 'prod':
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'citbank.settings.prod')
+else:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'citbank.settings.dev')
 
 application = get_asgi_application()
@@ -0,0 +1,164 @@
+"""
+Non-blocking logging for request threads.
+
+AsyncLogHandler only puts records on a bounded in-memory queue; a QueueListener thread formats them
+as JSON lines and writes them to stdout, where the platform collects the output of every process. When
+the queue is full records are dropped and counted instead of making the request wait for the write.
+Given a filename it appends to that one file instead, through a WatchedFileHandler so an external
+logrotate can rotate it under all processes.
+
+LogPayload wraps request and response bodies passed as log arguments so they are only serialized,
+redacted and truncated when a handler formats the record. The wrapped value is copied when the record
+is queued, since the caller is free to change it once the logging call returns.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+# Attributes every LogRecord has; anything else was passed through `extra` and is logged as a field
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, datefmt="%Y-%m-%dT%H:%M:%S%z"):
+        super().__init__(datefmt=datefmt)
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "thread": record.thread,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str)
+
+
+def redact(value, keys):
+    if isinstance(value, dict):
+        return {
+            key: "[REDACTED]" if str(key).lower() in keys else redact(item, keys) for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item, keys) for item in value]
+    return value
+
+
+class LogPayload:
+    """Log argument that serializes its value on first str(), not when the record is created"""
+
+    def __init__(self, value, max_length=None, redact_keys=(), secrets=()):
+        self.value = value
+        self.max_length = max_length
+        self.redact_keys = {key.lower() for key in redact_keys}
+        self.secrets = [secret for secret in secrets if secret]
+
+    def copy(self):
+        if isinstance(self.value, (str, bytes)):
+            return self
+        payload = copy.copy(self)
+        try:
+            payload.value = copy.deepcopy(self.value)
+        except Exception:
+            # NOT COPYABLE, SERIALIZE IT NOW INSTEAD
+            payload.value = str(self)
+        return payload
+
+    def __str__(self):
+        if isinstance(self.value, (str, bytes)):
+            text = self.value.decode(errors="replace") if isinstance(self.value, bytes) else self.value
+        else:
+            text = json.dumps(redact(self.value, self.redact_keys), default=str)
+        for secret in self.secrets:
+            text = text.replace(secret, "[REDACTED]")
+        if self.max_length and len(text) > self.max_length:
+            text = f"{text[:self.max_length]}... ({len(text) - self.max_length} more characters)"
+        return text
+
+
+class FlushingQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        # Block for room so stopping still drains a full queue
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogHandler(QueueHandler):
+    def __init__(self, filename=None, queueSize=10000, encoding="utf-8"):
+        super().__init__(queue.Queue(maxsize=queueSize))
+        self.filename = filename
+        self.encoding = encoding
+        self.output_formatter = JsonFormatter()
+        self.output_handler = None
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+        self.listener = None
+        self.listener_pid = None
+        self.start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread, so the formatter belongs to the output handler
+        self.output_formatter = fmt
+        if self.output_handler is not None:
+            self.output_handler.setFormatter(fmt)
+
+    def build_output_handler(self):
+        if self.filename:
+            return WatchedFileHandler(self.filename, encoding=self.encoding, delay=True)
+        return logging.StreamHandler(sys.stdout)
+
+    def start(self):
+        # Also restarts the listener in a forked worker, where the parent's thread does not exist
+        with self.start_lock:
+            if self.listener_pid != os.getpid():
+                self.output_handler = self.build_output_handler()
+                self.output_handler.setFormatter(self.output_formatter)
+                self.listener = FlushingQueueListener(self.queue, self.output_handler, respect_handler_level=True)
+                self.listener.start()
+                self.listener_pid = os.getpid()
+
+    def stop(self):
+        if self.listener is not None and self.listener_pid == os.getpid():
+            self.listener.stop()
+            self.listener_pid = None
+            self.output_handler.close()
+
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare, the message is not formatted here but on the listener thread.
+        # LogPayload arguments are copied now, before the caller can change the values they wrap
+        if isinstance(record.args, tuple) and any(isinstance(arg, LogPayload) for arg in record.args):
+            record = copy.copy(record)
+            record.args = tuple(arg.copy() if isinstance(arg, LogPayload) else arg for arg in record.args)
+        return record
+
+    def enqueue(self, record):
+        if self.listener_pid != os.getpid():
+            self.start()
+
+        with self.dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+        try:
+            if dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": "Log queue was full, %d records dropped", "args": (dropped,),
+                }))
+                dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.dropped_lock:
+                self.dropped += dropped + 1
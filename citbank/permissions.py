@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from rest_framework.permissions import BasePermission
+
+
+class IsAdminOrCronSecret(BasePermission):
+    """
+    Allows staff users, and schedulers that send CRON_SECRET in the X-Cron-Secret header.
+
+    Nothing is accepted by header while CRON_SECRET is empty.
+    """
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+
+        secret = request.headers.get("X-Cron-Secret")
+        return bool(settings.CRON_SECRET and secret and constant_time_compare(secret, settings.CRON_SECRET))
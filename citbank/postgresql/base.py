@@ -0,0 +1,39 @@
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend with Django 4.1's CONN_HEALTH_CHECKS backported.
+
+    A connection kept open by CONN_MAX_AGE may have been dropped by PostgreSQL, pgbouncer or the network
+    since the previous request. With CONN_HEALTH_CHECKS it is checked once per request, when the request
+    first opens a cursor on it, so a dead connection is replaced instead of failing the query. Requests that
+    never query the database, and later queries of the same request, cost no extra round trip.
+    """
+    health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def connect(self):
+        super().connect()
+        # A NEW CONNECTION NEEDS NO CHECK
+        self.health_check_done = True
+
+    def close_if_health_check_failed(self):
+        if self.connection is None or not self.health_check_enabled or self.health_check_done:
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+    def close_if_unusable_or_obsolete(self):
+        # Runs when each request starts and finishes, so the next request checks the connection again
+        if self.connection is not None:
+            self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
@@ -1,7 +1,5 @@
-import logging
 import os.path
 from pathlib import Path
-from datetime import timedelta
 
 import environ
 
@@ -37,6 +35,8 @@ INSTALLED_APPS = [
     'api.apps.ApiConfig',
     'superadmin.apps.SuperadminConfig',
     'billpayment.apps.BillpaymentConfig',
+    'notification.apps.NotificationConfig',
+    'loadtest.apps.LoadtestConfig',
 ]
 
 MIDDLEWARE = [
@@ -125,56 +125,140 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 # Logging
-logging.basicConfig(
-    filename='citbank.log',
-    filemode='a',
-    level=logging.DEBUG,
-    format='[{asctime}] {levelname} {module} {thread:d} - {message}',
-    datefmt='%d-%m-%Y %H:%M:%S',
-    style='{',
-)
+# Records are queued by the request thread and written as JSON lines by a background thread,
+# see citbank/log.py. LOG_QUEUE_SIZE bounds the buffer; records are dropped when it is full.
+# Every process (web workers, send_notifications, release) writes to stdout, or appends to LOG_FILE
+# when set; rotate that file with logrotate, the handler reopens it once it has been moved.
+LOG_LEVEL = env('LOG_LEVEL', default='INFO')
 
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '[{asctime}] {levelname} {module} {thread:d} - {message}',
-            'style': '{',
-            'datefmt': '%d-%m-%Y %H:%M:%S'
+        'json': {
+            '()': 'citbank.log.JsonFormatter',
         },
     },
     'handlers': {
-        'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': 'citbank.log',
-            'formatter': 'verbose',
+        'default': {
+            'level': LOG_LEVEL,
+            'class': 'citbank.log.AsyncLogHandler',
+            'filename': env('LOG_FILE', default=None),
+            'queueSize': env.int('LOG_QUEUE_SIZE', default=10000),
+            'formatter': 'json',
         },
     },
     'root': {
-        'handlers': ['file'],
-        'level': 'INFO',
+        'handlers': ['default'],
+        'level': LOG_LEVEL,
     },
     'loggers': {
         'django': {
-            'handlers': ['file'],
-            'level': 'INFO',
-            'propagate': True,
-        },
-        'django.server': {
-            'handlers': ['file'],
-            'level': 'INFO',
-            'propagate': True,
-        },
-        'django.request': {
-            'handlers': ['file'],
             'level': 'INFO',
             'propagate': True,
         },
     },
 }
 
+# DATABASE CONNECTIONS
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds and reused by later requests on the same
+# worker thread (0 closes them after every request). With DATABASE_CONN_HEALTH_CHECKS a reused connection
+# is checked once per request, on its first query; see citbank/postgresql/base.py.
+# Behind pgbouncer in transaction pooling mode set DATABASE_DISABLE_SERVER_SIDE_CURSORS, since a named
+# cursor cannot outlive the transaction; QuerySet.iterator() then loads its whole result at once.
+# Session pooling needs no changes. Benchmark with `manage.py benchmark_connections`.
+DATABASE_CONN_MAX_AGE = env.int('DATABASE_CONN_MAX_AGE', default=60)
+DATABASE_CONN_HEALTH_CHECKS = env.bool('DATABASE_CONN_HEALTH_CHECKS', default=True)
+DATABASE_DISABLE_SERVER_SIDE_CURSORS = env.bool('DATABASE_DISABLE_SERVER_SIDE_CURSORS', default=False)
+
+# UPSTREAM REQUEST LOGGING
+# Failed BankOne and TM SaaS calls are always logged at WARNING; successful calls are logged at INFO
+# for a LOG_REQUEST_SAMPLE_RATE fraction (0 to 1) of calls. Payloads and responses are cut to
+# LOG_REQUEST_MAX_LENGTH characters. LOG_REDACT_KEYS values are masked at any depth, and the BankOne
+# token and TM client id wherever they appear.
+LOG_REQUEST_SAMPLE_RATE = env.float('LOG_REQUEST_SAMPLE_RATE', default=1.0)
+LOG_REQUEST_MAX_LENGTH = env.int('LOG_REQUEST_MAX_LENGTH', default=2000)
+LOG_REDACT_KEYS = env.list('LOG_REDACT_KEYS', default=[
+    'authtoken', 'AuthenticationKey', 'Authorization', 'client-id', 'password', 'otp', 'pin', 'transaction_pin',
+    'new_pin', 'confirm_new_pin', 'bvn',
+])
+
+# ENCRYPTION
+# Comma separated Fernet keys, newest first. The key derived from SECRET_KEY is always
+# appended so existing BVN and PIN values stay readable; run `manage.py rotate_encryption_keys`
+# after adding a key.
+FERNET_KEYS = env.list('FERNET_KEYS', default=[])
+
+# ADMIN LISTINGS
+ADMIN_LIST_CHUNK_SIZE = env.int('ADMIN_LIST_CHUNK_SIZE', default=500)
+ADMIN_LIST_PAGE_SIZE = env.int('ADMIN_LIST_PAGE_SIZE', default=50)
+
+# OTP
+# OTPs live in the default cache; they expire after OTP_TTL seconds or OTP_MAX_ATTEMPTS wrong guesses
+OTP_TTL = env.int('OTP_TTL', default=600)
+OTP_MAX_ATTEMPTS = env.int('OTP_MAX_ATTEMPTS', default=5)
+
+# IDEMPOTENCY KEYS
+# Stored responses are replayed for IDEMPOTENCY_KEY_TTL seconds. A key still in progress after
+# IDEMPOTENCY_LOCK_TIMEOUT seconds is treated as abandoned and may be taken over by a retry.
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=24 * 3600)
+IDEMPOTENCY_LOCK_TIMEOUT = env.int('IDEMPOTENCY_LOCK_TIMEOUT', default=300)
+
+# NOTIFICATION OUTBOX
+# Retry delay doubles per attempt, starting at NOTIFICATION_RETRY_DELAY seconds. Bodies are blanked once a
+# message is sent or given up on; `manage.py purge_notifications` deletes those rows after NOTIFICATION_RETENTION.
+# A claimed batch is left to its worker for NOTIFICATION_CLAIM_TIMEOUT seconds, then sent again.
+NOTIFICATION_BATCH_SIZE = env.int('NOTIFICATION_BATCH_SIZE', default=200)
+NOTIFICATION_SMS_CHUNK_SIZE = env.int('NOTIFICATION_SMS_CHUNK_SIZE', default=50)
+NOTIFICATION_MAX_ATTEMPTS = env.int('NOTIFICATION_MAX_ATTEMPTS', default=6)
+NOTIFICATION_RETRY_DELAY = env.int('NOTIFICATION_RETRY_DELAY', default=30)
+NOTIFICATION_MAX_RETRY_DELAY = env.int('NOTIFICATION_MAX_RETRY_DELAY', default=3600)
+NOTIFICATION_RETENTION = env.int('NOTIFICATION_RETENTION', default=7 * 24 * 3600)
+NOTIFICATION_CLAIM_TIMEOUT = env.int('NOTIFICATION_CLAIM_TIMEOUT', default=600)
+
+# BANKONE ACCOUNT ENQUIRY CACHE
+# Long enough to cover the signup OTP and registration requests for the same account
+ACCOUNT_ENQUIRY_CACHE_TTL = env.int('ACCOUNT_ENQUIRY_CACHE_TTL', default=300)
+
+# BILL PAYMENT BALANCE CHECK
+# Off by default: charges go straight to BankOne, which declines insufficient funds with ResponseCode 51.
+# When on, balances are cached for BILL_PAYMENT_BALANCE_TTL seconds and dropped after every charge.
+BILL_PAYMENT_BALANCE_PRECHECK = env.bool('BILL_PAYMENT_BALANCE_PRECHECK', default=False)
+BILL_PAYMENT_BALANCE_TTL = env.int('BILL_PAYMENT_BALANCE_TTL', default=30)
+
+# CRON JOBS
+# Cron endpoints accept staff users, or a scheduler sending this value in the X-Cron-Secret header.
+# Give the scheduler jobs the header before deploying a release that checks it; prod will not start without it
+CRON_SECRET = env('CRON_SECRET', default='')
+
+# BILL PAYMENT REVERSAL CRON
+# A claimed reversal is left to its runner for BILL_REVERSAL_CLAIM_TIMEOUT seconds, then retried
+BILL_REVERSAL_BATCH_SIZE = env.int('BILL_REVERSAL_BATCH_SIZE', default=100)
+BILL_REVERSAL_WORKERS = env.int('BILL_REVERSAL_WORKERS', default=8)
+BILL_REVERSAL_RATE_LIMIT = env.float('BILL_REVERSAL_RATE_LIMIT', default=20)
+BILL_REVERSAL_CLAIM_TIMEOUT = env.int('BILL_REVERSAL_CLAIM_TIMEOUT', default=600)
+
+# ELECTRICITY VEND RETRY CRON
+# Retry delay doubles per attempt, starting at ELECTRICITY_RETRY_DELAY seconds. A claimed vend is left
+# to its runner for ELECTRICITY_RETRY_CLAIM_TIMEOUT seconds.
+ELECTRICITY_RETRY_DISCOS = env.list('ELECTRICITY_RETRY_DISCOS', default=[
+    'EKEDC_PREPAID', 'EKEDC_POSTPAID', 'IKEDC_PREPAID', 'IKEDC_POSTPAID', 'IBEDC_PREPAID', 'IBEDC_POSTPAID',
+])
+ELECTRICITY_RETRY_BATCH_SIZE = env.int('ELECTRICITY_RETRY_BATCH_SIZE', default=100)
+ELECTRICITY_RETRY_WORKERS = env.int('ELECTRICITY_RETRY_WORKERS', default=8)
+ELECTRICITY_RETRY_RATE_LIMIT = env.float('ELECTRICITY_RETRY_RATE_LIMIT', default=10)
+ELECTRICITY_RETRY_DELAY = env.int('ELECTRICITY_RETRY_DELAY', default=60)
+ELECTRICITY_RETRY_MAX_DELAY = env.int('ELECTRICITY_RETRY_MAX_DELAY', default=3600)
+ELECTRICITY_RETRY_MAX_AGE = env.int('ELECTRICITY_RETRY_MAX_AGE', default=2 * 24 * 3600)
+ELECTRICITY_RETRY_CLAIM_TIMEOUT = env.int('ELECTRICITY_RETRY_CLAIM_TIMEOUT', default=600)
+
+# CACHE
+# OTPs have no database table, so every process that serves requests must share this cache.
+# The locmem default is per process: run one process locally or point CACHE_URL at Redis.
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -186,3 +270,55 @@ CIT_EMAIL_FROM = "support@citmfb.com"
 CIT_ENQUIRY_EMAIL = "info@citmfb.com"
 CIT_FEEDBACK_EMAIL = "helpdesk@citmfb.com"
 CIT_ACCOUNT_OFFICE_RATING_EMAIL = "rating@citmfb.com"
+
+# BANK ONE HTTP CLIENT
+# Timeouts are (connect, read) seconds per endpoint group used in bankone/api.py
+BANK_ONE_POOL_SIZE = env.int('BANK_ONE_POOL_SIZE', default=10)
+BANK_ONE_POOL_BLOCK = env.bool('BANK_ONE_POOL_BLOCK', default=False)
+BANK_ONE_POOL_TIMEOUT = env.float('BANK_ONE_POOL_TIMEOUT', default=10)
+# The async client (bankone/aio.py) holds up to BANK_ONE_ASYNC_POOL_SIZE connections per event loop;
+# calls beyond BANK_ONE_ASYNC_MAX_CONCURRENCY in flight wait their turn
+BANK_ONE_ASYNC_POOL_SIZE = env.int('BANK_ONE_ASYNC_POOL_SIZE', default=50)
+BANK_ONE_ASYNC_MAX_CONCURRENCY = env.int('BANK_ONE_ASYNC_MAX_CONCURRENCY', default=50)
+BANK_ONE_TIMEOUTS = {
+    'default': (5, 30),
+    'enquiry': (5, 20),
+    'transfer': (5, 60),
+    'reversal': (5, 60),
+    'messaging': (5, 15),
+}
+
+# TM SAAS HTTP CLIENT
+# Timeouts are (connect, read) seconds per tm_saas/api.py operation
+TM_POOL_SIZE = env.int('TM_POOL_SIZE', default=10)
+TM_POOL_TIMEOUT = env.float('TM_POOL_TIMEOUT', default=10)
+TM_TIMEOUTS = {
+    'default': (5, 30),
+    'get_networks': (3, 10),
+    'get_data_plan': (3, 10),
+    'get_services': (3, 10),
+    'get_service_products': (3, 10),
+    'get_discos': (3, 10),
+    'validate_scn': (5, 20),
+    'validate_meter_no': (5, 20),
+    'purchase_airtime': (5, 60),
+    'purchase_data': (5, 60),
+    'cable_tv_sub': (5, 60),
+    'electricity': (5, 90),
+    'retry_electricity': (5, 30),
+}
+
+# TM SAAS CATALOG CACHE
+# Fresh TTL in seconds per catalog; stale entries are served for TM_CATALOG_STALE_TTL more
+# seconds while a background refresh runs
+TM_CATALOG_TTL = {
+    'default': 3600,
+    'networks': 6 * 3600,
+    'data_plans': 3600,
+    'services': 6 * 3600,
+    'service_products': 3600,
+    'discos': 6 * 3600,
+}
+TM_CATALOG_STALE_TTL = env.int('TM_CATALOG_STALE_TTL', default=24 * 3600)
+TM_CATALOG_WARM_SERVICE_TYPES = env.list('TM_CATALOG_WARM_SERVICE_TYPES', default=[])
+TM_CATALOG_WARM_SERVICE_NAMES = env.list('TM_CATALOG_WARM_SERVICE_NAMES', default=[])
@@ -2,6 +2,7 @@ import django_heroku
 from .base import *
 from decouple import config
 import dj_database_url
+from datetime import timedelta
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = env('SECRET_KEY')
@@ -27,12 +28,15 @@ ALLOWED_HOSTS = []
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'citbank.postgresql',
         'NAME': "citbank_db",
         'USER': "citbank",
         'PASSWORD': "citbank",
         'HOST': "localhost",
         'PORT': "5432",
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
+        'DISABLE_SERVER_SIDE_CURSORS': DATABASE_DISABLE_SERVER_SIDE_CURSORS,
     }
 }
 
@@ -57,5 +61,5 @@ TM_BASE_URL = env('TM_BASE_URL')
 SERVICE_CHARGE = env('SERVICE_CHARGE')
 
 # Activate Django-Heroku.
-django_heroku.settings(locals())
+django_heroku.settings(locals(), logging=False)
 
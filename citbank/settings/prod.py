@@ -13,12 +13,25 @@ ALLOWED_HOSTS = ['api.citmfb.com']
 # DATABASE
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'citbank.postgresql',
         'NAME': env('DATABASE_NAME'),
         'USER': env('DATABASE_USER'),
         'PASSWORD': env('DATABASE_PASSWORD'),
         'HOST': env('DATABASE_HOST'),
         'PORT': env('DATABASE_PORT'),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
+        'DISABLE_SERVER_SIDE_CURSORS': DATABASE_DISABLE_SERVER_SIDE_CURSORS,
+    }
+}
+
+# CACHE
+# OTPs, BankOne enquiries and TM catalogs are cached here and must be shared by every worker.
+# REDIS_URL is required: OTPs are only kept here since the CustomerOTP table was dropped
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': env('REDIS_URL'),
     }
 }
 
@@ -43,6 +56,9 @@ TM_BASE_URL = env('TM_BASE_URL')
 
 SERVICE_CHARGE = env('SERVICE_CHARGE')
 
+# CRON JOBS
+CRON_SECRET = env('CRON_SECRET')
+
 # GRAYLOG
 GRAYLOG_ENDPOINT = env('GRAYLOG_ENDPOINT')
 GRAYLOG_HEADERS = True
@@ -0,0 +1,111 @@
+import json
+import random
+import threading
+
+from django.core.management.base import CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.tokens import AccessToken
+
+from loadtest.management.commands.run_loadtest import SCENARIOS, Command as LoadTestCommand, git_commit, percentile
+
+
+class Command(LoadTestCommand):
+    help = (
+        "Compare request latency with a new database connection per request (CONN_MAX_AGE=0) against "
+        "persistent connections. Requests run one at a time on this thread, the way a sync gunicorn worker "
+        "serves them, with the connection housekeeping Django runs on request_started and request_finished. "
+        "The transfer scenario needs BANK_ONE_3PS_URL pointing at run_upstream_stub."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenarios", default="login,history", help=f"Comma separated, from {SCENARIOS}")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario and mode")
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario and mode")
+        parser.add_argument("--users", type=int, default=5, help="Load test customers to create or reuse")
+        parser.add_argument("--conn-max-age", type=int, default=60, help="CONN_MAX_AGE for the persistent mode")
+        parser.add_argument("--output", help="Write results to this JSON file")
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        users = self.setup_users(options["users"])
+        self.rng = random.Random(1)
+        self.rng_lock = threading.Lock()
+        self.tokens = {user.id: str(AccessToken.for_user(user)) for user in users}
+
+        modes = {"per_request": 0, "persistent": options["conn_max_age"]}
+        results = {"commit": git_commit(), "database": connection.vendor, "modes": modes, "scenarios": {}}
+        original_max_age = connection.settings_dict["CONN_MAX_AGE"]
+        try:
+            for name in scenarios:
+                results["scenarios"][name] = {}
+                for mode, max_age in modes.items():
+                    self.set_conn_max_age(max_age)
+                    self.measure(name, users, options["warmup"])
+                    results["scenarios"][name][mode] = self.measure(name, users, options["requests"])
+        finally:
+            self.set_conn_max_age(original_max_age)
+
+        self.report_modes(results["scenarios"])
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def set_conn_max_age(self, max_age):
+        # close_at is computed when a connection opens, so start the mode from a closed connection
+        connection.close()
+        connection.settings_dict["CONN_MAX_AGE"] = max_age
+
+    def send(self, name, users):
+        # The test client disconnects close_old_connections from the request signals, so run it here
+        close_old_connections()
+        try:
+            return super().send(name, users)
+        finally:
+            close_old_connections()
+
+    def measure(self, name, users, total):
+        if total <= 0:
+            return None
+
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            opened.append(connection.alias)
+
+        connection_created.connect(count_connection)
+        try:
+            samples = [self.send(name, users) for _ in range(total)]
+        finally:
+            connection_created.disconnect(count_connection)
+
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        return {
+            "requests": total,
+            "errors": sum(1 for _, status_code, _ in samples if not str(status_code).startswith("2")),
+            "connections_opened": len(opened),
+            "mean_ms": round(sum(latencies) / total, 3),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+        }
+
+    def report_modes(self, scenarios):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'scenario':<14}{'mode':<14}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'connects':>10}{'errors':>8}"
+        )
+        for name, modes in scenarios.items():
+            for mode, result in modes.items():
+                self.stdout.write(
+                    f"{name:<14}{mode:<14}{result['mean_ms']:>10.2f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                    f"{result['connections_opened']:>10}{result['errors']:>8}"
+                )
+            per_request, persistent = modes["per_request"], modes["persistent"]
+            self.stdout.write(
+                f"{'':<14}saved {per_request['mean_ms'] - persistent['mean_ms']:.2f} ms per request on average"
+            )
@@ -0,0 +1,184 @@
+import json
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from account.models import Customer, CustomerAccount, Transaction
+from account.paginations import KeysetPagination
+from billpayment.models import BillPaymentReversal, Electricity
+
+BENCH_PREFIX = "bench_"
+DISCOS = ["EKEDC_PREPAID", "EKEDC_POSTPAID", "IKEDC_PREPAID", "IKEDC_POSTPAID", "IBEDC_PREPAID", "IBEDC_POSTPAID"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a local PostgreSQL database with benchmark rows and compare query plans for the hot lookups with "
+        "and without their indexes. Indexes are dropped inside a rolled back transaction, which takes table "
+        "locks: never run this against a shared database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", action="store_true", help="Insert benchmark rows before measuring")
+        parser.add_argument("--transactions", type=int, default=2000000, help="Transaction rows to seed")
+        parser.add_argument("--cleanup", action="store_true", help="Delete previously seeded rows and exit")
+        parser.add_argument("--output", help="Write the plans and timings to this JSON file")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("benchmark_indexes needs PostgreSQL, partial indexes and EXPLAIN output differ elsewhere")
+
+        if options["cleanup"]:
+            self.cleanup()
+            return
+
+        if options["seed"]:
+            if User.objects.filter(username__startswith=BENCH_PREFIX).exists():
+                raise CommandError("Benchmark rows already exist, run with --cleanup first")
+            self.seed(options["transactions"])
+
+        results = [self.measure(label, queryset, indexes) for label, queryset, indexes in self.get_queries()]
+
+        self.stdout.write("")
+        self.stdout.write(f"{'query':<36}{'without index (ms)':>20}{'with index (ms)':>18}")
+        for result in results:
+            self.stdout.write(f"{result['query']:<36}{result['before_ms']:>20.3f}{result['after_ms']:>18.3f}")
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Plans written to {options['output']}"))
+
+    def seed(self, total):
+        customers = max(total // 50, 1)
+        bill_rows = max(total // 10, 1)
+        self.stdout.write(f"Seeding {customers} customers, {total} transactions and {bill_rows} bill payment rows...")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO auth_user (password, is_superuser, username, first_name, last_name, email, is_staff,
+                                       is_active, date_joined)
+                SELECT '!', false, %s || g, 'Bench', 'User ' || g, %s || g || '@example.com', false, true, now()
+                FROM generate_series(1, %s) g
+                """, [BENCH_PREFIX, BENCH_PREFIX, customers]
+            )
+            cursor.execute(
+                """
+                INSERT INTO account_customer (user_id, "customerID", phone_number, bvn, daily_limit, transfer_limit,
+                                              active, created_on, updated_on)
+                SELECT id, 'BENCH' || id, '080' || lpad(id::text, 8, '0'), '', 200000, 100000, true,
+                       now() - random() * interval '365 days', now()
+                FROM auth_user WHERE username LIKE %s
+                """, [f"{BENCH_PREFIX}%"]
+            )
+            cursor.execute(
+                """
+                INSERT INTO account_customeraccount (customer_id, account_no, account_type, active)
+                SELECT id, '9' || lpad(id::text, 9, '0'), 'SAVINGS', true
+                FROM account_customer WHERE "customerID" LIKE 'BENCH%'
+                """
+            )
+            cursor.execute(
+                """
+                INSERT INTO account_transaction (customer_id, transaction_type, transaction_option, beneficiary_name,
+                                                 status, amount, narration, reference, created_on, updated_on)
+                SELECT ids[1 + (g %% array_length(ids, 1))], 'transfer', 'cit_bank_transfer', 'Bench Beneficiary',
+                       CASE WHEN g %% 10 = 0 THEN 'failed' WHEN g %% 50 = 1 THEN 'pending' ELSE 'success' END,
+                       (g %% 50000) + 100, 'benchmark seed', 'B' || lpad(g::text, 11, '0'),
+                       now() - (g %% 525600) * interval '1 minute', now()
+                FROM (SELECT array_agg(id) AS ids FROM account_customer WHERE "customerID" LIKE 'BENCH%%') c,
+                     generate_series(1, %s) g
+                """, [total]
+            )
+            cursor.execute(
+                """
+                INSERT INTO billpayment_billpaymentreversal (transaction_date, transaction_reference, payment_type,
+                                                             status, created_on, updated_on)
+                SELECT (now() - (g %% 525600) * interval '1 minute')::date::text, 'BENCH-' || g, 'airtime',
+                       CASE WHEN g %% 100 = 0 THEN 'pending' ELSE 'completed' END,
+                       now() - (g %% 525600) * interval '1 minute', now()
+                FROM generate_series(1, %s) g
+                """, [bill_rows]
+            )
+            cursor.execute(
+                """
+                INSERT INTO billpayment_electricity (account_no, disco_type, meter_number, amount, phone_number,
+                                                     status, transaction_id, reference, token_sent, attempt_count,
+                                                     created_on)
+                SELECT '9' || lpad((g %% 100000)::text, 9, '0'), (%s::text[])[1 + (g %% 6)], 'BENCH' || g, 1000,
+                       '08000000000', CASE WHEN g %% 50 = 0 THEN 'pending' ELSE 'success' END, 'BENCH-TX-' || g,
+                       'BENCH-' || g, true, 0, now() - (g %% 525600) * interval '1 minute'
+                FROM generate_series(1, %s) g
+                """, [DISCOS, bill_rows]
+            )
+            for model in (User, Customer, CustomerAccount, Transaction, BillPaymentReversal, Electricity):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def cleanup(self):
+        with transaction.atomic():
+            Transaction.objects.filter(narration="benchmark seed").delete()
+            BillPaymentReversal.objects.filter(transaction_reference__startswith="BENCH-").delete()
+            Electricity.objects.filter(meter_number__startswith="BENCH").delete()
+            User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        self.stdout.write(self.style.SUCCESS("Benchmark rows removed"))
+
+    def get_queries(self):
+        customer = Customer.objects.filter(customerID__startswith="BENCH").order_by("id").last()
+        if customer is None:
+            raise CommandError("No benchmark rows found, run with --seed first")
+
+        account_no = CustomerAccount.objects.filter(customer=customer).values_list("account_no", flat=True).first()
+        reference = Transaction.objects.filter(customer=customer).values_list("reference", flat=True).first()
+
+        # DEEP PAGES START FROM THE CURSOR OF A ROW HALFWAY DOWN THE LIST
+        history = Transaction.objects.filter(customer=customer).order_by("-created_on", "-id")
+        transfers = Transaction.objects.order_by("-created_on", "-id")
+        history_position = history.values_list("created_on", "id")[history.count() // 2]
+        transfers_position = transfers.values_list("created_on", "id")[transfers.count() // 2]
+
+        return [
+            ("customer account by account_no", CustomerAccount.objects.filter(account_no=account_no),
+             ["customer_account_no_idx"]),
+            ("transaction by reference", Transaction.objects.filter(reference=reference),
+             ["transaction_reference_idx"]),
+            ("customer history page",
+             Transaction.objects.filter(customer=customer).order_by("-created_on", "-id")[:11],
+             ["transaction_cust_recent_idx"]),
+            ("customer history deep page",
+             KeysetPagination.filter_after(history, *history_position)[:11], ["transaction_cust_recent_idx"]),
+            ("admin transfers page", Transaction.objects.order_by("-created_on", "-id")[:11],
+             ["transaction_recent_idx"]),
+            ("admin transfers deep page",
+             KeysetPagination.filter_after(transfers, *transfers_position)[:11], ["transaction_recent_idx"]),
+            ("user by email", User.objects.filter(email=customer.user.email), ["account_auth_user_email_idx"]),
+            ("pending reversals", BillPaymentReversal.objects.filter(status="pending").order_by("created_on"),
+             ["reversal_pending_idx"]),
+            ("pending electricity vends",
+             Electricity.objects.filter(disco_type__in=DISCOS[:2], status="pending").order_by("created_on"),
+             ["electricity_pending_idx", "electricity_disco_status_idx"]),
+        ]
+
+    def explain(self, queryset):
+        plan = queryset.explain(analyze=True, buffers=True)
+        match = re.search(r"Execution Time: ([\d.]+) ms", plan)
+        return plan, float(match.group(1)) if match else 0.0
+
+    def measure(self, label, queryset, indexes):
+        after_plan, after_ms = self.explain(queryset)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index in indexes:
+                    cursor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(index)}")
+            before_plan, before_ms = self.explain(queryset)
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(f"-- without {', '.join(indexes)}\n{before_plan}\n-- with indexes\n{after_plan}\n")
+        return {
+            "query": label, "indexes": indexes, "before_ms": before_ms, "after_ms": after_ms,
+            "before_plan": before_plan, "after_plan": after_plan,
+        }
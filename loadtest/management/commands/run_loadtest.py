@@ -0,0 +1,268 @@
+import ipaddress
+import json
+import math
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from account.models import Customer, CustomerAccount, Transaction
+from account.utils import encrypt_text
+from bankone.api import pool_stats
+from billpayment.models import Airtime, CableTV, Data, Electricity
+from tm_saas.api import client_stats
+
+USER_PREFIX = "loadtest_"
+ACCOUNT_PREFIX = "70000"
+PASSWORD = "123456"
+TRANSACTION_PIN = "1234"
+SCENARIOS = ["login", "transfer", "history", "airtime", "data", "cable", "electricity"]
+
+
+def percentile(values, fraction):
+    # NEAREST-RANK PERCENTILE OF A SORTED LIST
+    if not values:
+        return None
+    return values[max(int(math.ceil(fraction * len(values))) - 1, 0)]
+
+
+def is_loopback(url):
+    host = urlparse(url or "").hostname
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def ensure_local_target():
+    # Load test users get a known password and unlimited transfer limits, so never create them on a real deployment
+    upstreams = [settings.BANK_ONE_BASE_URL, settings.BANK_ONE_3PS_URL, settings.TM_BASE_URL]
+    if not settings.DEBUG and not all(is_loopback(url) for url in upstreams):
+        raise CommandError(
+            "Refusing to run: load tests need DEBUG on, or BANK_ONE_BASE_URL, BANK_ONE_3PS_URL and TM_BASE_URL "
+            "pointing at a loopback address such as run_upstream_stub"
+        )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the login, transfer, history and bill payment endpoints in process at a fixed concurrency and "
+        "report latency percentiles, throughput and DB queries per request. Run it against a local database with "
+        "BANK_ONE_BASE_URL, BANK_ONE_3PS_URL and TM_BASE_URL pointing at run_upstream_stub."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma separated, from {SCENARIOS}")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario")
+        parser.add_argument("--users", type=int, default=20, help="Load test customers to create or reuse")
+        parser.add_argument("--seed", type=int, default=1, help="Seed for picking users per request")
+        parser.add_argument("--output", help="Write results to this JSON file")
+        parser.add_argument("--compare", help="Previous results JSON to print p95 and query deltas against")
+        parser.add_argument("--cleanup", action="store_true", help="Delete load test users and their rows and exit")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            self.cleanup()
+            return
+
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        users = self.setup_users(options["users"])
+        self.rng = random.Random(options["seed"])
+        self.rng_lock = threading.Lock()
+        self.tokens = {user.id: str(AccessToken.for_user(user)) for user in users}
+
+        results = {
+            "commit": git_commit(), "started_on": timezone.now().isoformat(), "database": connection.vendor,
+            "concurrency": options["concurrency"], "requests": options["requests"], "users": len(users),
+            "upstreams": {
+                "bankone": settings.BANK_ONE_BASE_URL, "bankone_3ps": settings.BANK_ONE_3PS_URL, "tm": settings.TM_BASE_URL,
+            },
+            "scenarios": {},
+        }
+
+        for name in scenarios:
+            self.run_scenario(name, users, options["warmup"], options["concurrency"])
+            results["scenarios"][name] = self.run_scenario(name, users, options["requests"], options["concurrency"])
+
+        results["upstream_pools"] = {"bankone": pool_stats(), "tm": client_stats()}
+        self.report(results["scenarios"])
+
+        if options["compare"]:
+            with open(options["compare"]) as baseline:
+                self.compare(json.load(baseline), results)
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def setup_users(self, count):
+        ensure_local_target()
+        users = []
+        encrypted_pin = encrypt_text(TRANSACTION_PIN)
+        password = make_password(PASSWORD)
+        for index in range(1, count + 1):
+            account_no = f"{ACCOUNT_PREFIX}{index:05d}"
+            user, created = User.objects.get_or_create(
+                username=f"{USER_PREFIX}{index}", defaults={"password": password, "email": f"{USER_PREFIX}{index}@example.com"}
+            )
+            if created:
+                customer = Customer.objects.create(
+                    user=user, customerID=f"CUS{account_no}", phone_number=f"080{account_no[-8:]}",
+                    transaction_pin=encrypted_pin, daily_limit=10 ** 12, transfer_limit=10 ** 9, active=True,
+                )
+                CustomerAccount.objects.create(customer=customer, account_no=account_no, account_type="SAVINGS")
+            user.account_no = account_no
+            users.append(user)
+        return users
+
+    def cleanup(self):
+        ensure_local_target()
+        accounts = list(CustomerAccount.objects.filter(
+            customer__user__username__startswith=USER_PREFIX).values_list("account_no", flat=True))
+        with transaction.atomic():
+            Transaction.objects.filter(customer__user__username__startswith=USER_PREFIX).delete()
+            for model in (Airtime, Data, CableTV, Electricity):
+                model.objects.filter(account_no__in=accounts).delete()
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+        self.stdout.write(self.style.SUCCESS(f"Removed load test users and rows for {len(accounts)} accounts"))
+
+    def pick_user(self, users):
+        with self.rng_lock:
+            return self.rng.choice(users)
+
+    def build_request(self, name, user):
+        # RETURN (METHOD, PATH, PAYLOAD, AUTHENTICATED)
+        if name == "login":
+            return "post", "/account/login/", {"username": user.username, "password": PASSWORD}, False
+        if name == "transfer":
+            return "post", "/account/transaction/", {
+                "account_number": user.account_no, "transaction_type": "transfer",
+                "transaction_option": "cit_bank_transfer", "amount": "100", "narration": "loadtest transfer",
+                "beneficiary_name": "Load Test", "beneficiary_number": "0000000000", "transaction_pin": TRANSACTION_PIN,
+            }, True
+        if name == "history":
+            return "get", "/account/transaction/", {"pagination": "cursor"}, True
+        if name in ("airtime", "data"):
+            return "post", "/bills/recharge/", {
+                "account_no": user.account_no, "phone_number": "08000000000", "network": "MTN", "amount": "100",
+                "purchase_type": name, "plan_id": "MTN-1", "transaction_pin": TRANSACTION_PIN,
+            }, True
+        if name == "cable":
+            return "post", "/bills/cable/", {
+                "account_no": user.account_no, "service_name": "dstv", "duration": "1", "phone_number": "08000000000",
+                "amount": "2500", "customer_name": "Load Test", "product_codes": "PRD1", "smart_card_no": "1234567890",
+                "transaction_pin": TRANSACTION_PIN,
+            }, True
+        return "post", "/bills/electricity/", {
+            "account_no": user.account_no, "disco_type": "EKEDC_PREPAID", "meter_no": "12345678901", "amount": "1000",
+            "phone_no": "08000000000", "transaction_pin": TRANSACTION_PIN,
+        }, True
+
+    def send(self, name, users):
+        user = self.pick_user(users)
+        method, path, payload, authenticated = self.build_request(name, user)
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {self.tokens[user.id]}"} if authenticated else {}
+
+        client = Client(SERVER_NAME="localhost")
+        if method == "post":
+            headers["content_type"] = "application/json"
+            payload = json.dumps(payload)
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            try:
+                status_code = getattr(client, method)(path, payload, **headers).status_code
+            except Exception:
+                status_code = "exception"
+            elapsed = time.perf_counter() - start
+        return elapsed, status_code, len(queries)
+
+    def run_scenario(self, name, users, total, concurrency):
+        if total <= 0:
+            return None
+
+        def worker(_):
+            try:
+                return self.send(name, users)
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(worker, range(total)))
+        duration = time.perf_counter() - start
+
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        queries = sorted(count for _, _, count in samples)
+        statuses = {}
+        for _, status_code, _ in samples:
+            statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+
+        return {
+            "requests": total,
+            "errors": sum(count for code, count in statuses.items() if not code.startswith("2")),
+            "status_codes": statuses,
+            "duration_s": round(duration, 3),
+            "throughput_rps": round(total / duration, 2),
+            "mean_ms": round(sum(latencies) / total, 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "queries_mean": round(sum(queries) / total, 2),
+            "queries_p95": percentile(queries, 0.95),
+        }
+
+    def report(self, scenarios):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'scenario':<14}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'queries':>9}"
+        )
+        for name, result in scenarios.items():
+            self.stdout.write(
+                f"{name:<14}{result['throughput_rps']:>9.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                f"{result['p99_ms']:>10.1f}{result['errors']:>8}{result['queries_mean']:>9.1f}"
+            )
+
+    def compare(self, baseline, results):
+        self.stdout.write("")
+        self.stdout.write(f"Compared with {baseline.get('commit') or 'baseline'}:")
+        for name, result in results["scenarios"].items():
+            previous = baseline.get("scenarios", {}).get(name)
+            if not previous:
+                continue
+            p95_change = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100 if previous["p95_ms"] else 0
+            self.stdout.write(
+                f"{name:<14}p95 {previous['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms ({p95_change:+.1f}%), "
+                f"queries {previous['queries_mean']:.1f} -> {result['queries_mean']:.1f}"
+            )
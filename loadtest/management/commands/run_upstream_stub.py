@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from loadtest.stub import add_arguments, build_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve stand-in BankOne and TM SaaS endpoints for offline load tests. Point BANK_ONE_BASE_URL, "
+        "BANK_ONE_3PS_URL and TM_BASE_URL at http://HOST:PORT/bankone, /3ps and /tm"
+    )
+
+    def add_arguments(self, parser):
+        add_arguments(parser)
+
+    def handle(self, *args, **options):
+        server = build_server(options)
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f"Upstream stub listening on http://{host}:{port}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,333 @@
+"""
+Local stand-in for the BankOne and TM SaaS endpoints called by bankone/api.py and tm_saas/api.py.
+
+Point the app at it with
+    BANK_ONE_BASE_URL=http://127.0.0.1:8001/bankone
+    BANK_ONE_3PS_URL=http://127.0.0.1:8001/3ps
+    TM_BASE_URL=http://127.0.0.1:8001/tm
+
+Latency specs are "fixed:MS", "uniform:MIN_MS,MAX_MS", "normal:MEAN_MS,SD_MS" or "lognormal:MEDIAN_MS,SIGMA".
+The module only uses the standard library so it can also run outside Django with python -m loadtest.stub.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_BALANCE = "1,000,000.00"
+
+DISCOS = ["EKEDC_PREPAID", "EKEDC_POSTPAID", "IKEDC_PREPAID", "IKEDC_POSTPAID", "IBEDC_PREPAID", "IBEDC_POSTPAID"]
+NETWORKS = ["MTN", "GLO", "AIRTEL", "9MOBILE"]
+
+
+def parse_latency(spec):
+    # RETURN A FUNCTION THAT DRAWS ONE DELAY IN SECONDS
+    name, _, args = str(spec or "fixed:0").partition(":")
+    try:
+        values = [float(value) for value in args.split(",") if value.strip()]
+        if name == "fixed":
+            delay, = values
+            return lambda rng: delay / 1000
+        if name == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high) / 1000
+        if name == "normal":
+            mean, deviation = values
+            return lambda rng: max(rng.gauss(mean, deviation), 0) / 1000
+        if name == "lognormal":
+            median, sigma = values
+            return lambda rng: rng.lognormvariate(math.log(median), sigma) / 1000
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def parse_mix(spec):
+    # "00=0.9,51=0.1" -> [("00", 0.9), ("51", 0.1)]
+    if isinstance(spec, dict):
+        return list(spec.items())
+    mix = []
+    for item in str(spec).split(","):
+        code, _, weight = item.partition("=")
+        mix.append((code.strip(), float(weight or 1)))
+    return mix
+
+
+class StubConfig:
+    """
+    Behaviour of the stub. latency and error_rate take a default plus overrides per endpoint, using the
+    endpoint names of bankone.api (enquiry, transfer, reversal, messaging) and tm_saas.api (function names).
+    """
+
+    def __init__(self, latency="fixed:0", error_rate=0.0, response_codes="00=1", vend_pending_rate=0.0,
+                 balance=DEFAULT_BALANCE, seed=None, overrides=None):
+        overrides = overrides or {}
+        self.latency = {"default": parse_latency(latency)}
+        self.latency.update({name: parse_latency(spec) for name, spec in overrides.get("latency", {}).items()})
+        self.error_rate = {"default": float(error_rate)}
+        self.error_rate.update({name: float(rate) for name, rate in overrides.get("error_rate", {}).items()})
+        self.response_codes = parse_mix(overrides.get("response_codes", response_codes))
+        self.vend_pending_rate = float(overrides.get("vend_pending_rate", vend_pending_rate))
+        self.balance = str(overrides.get("balance", balance))
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_options(cls, options):
+        overrides = {}
+        if options.get("config"):
+            with open(options["config"]) as config_file:
+                overrides = json.load(config_file)
+        return cls(
+            latency=options.get("latency"), error_rate=options.get("error_rate"),
+            response_codes=options.get("response_codes"), vend_pending_rate=options.get("vend_pending_rate"),
+            balance=options.get("balance"), seed=options.get("seed"), overrides=overrides,
+        )
+
+    def delay(self, endpoint):
+        with self.lock:
+            return self.latency.get(endpoint, self.latency["default"])(self.rng)
+
+    def fails(self, endpoint):
+        with self.lock:
+            return self.rng.random() < self.error_rate.get(endpoint, self.error_rate["default"])
+
+    def chance(self, rate):
+        with self.lock:
+            return self.rng.random() < rate
+
+    def response_code(self):
+        codes, weights = zip(*self.response_codes)
+        with self.lock:
+            return self.rng.choices(codes, weights)[0]
+
+
+def reference():
+    return str(uuid.uuid4().int)[:12]
+
+
+def customer_id(account_no):
+    # CUSTOMER IDS ARE DERIVED FROM THE ACCOUNT NUMBER SO ENQUIRIES STAY CONSISTENT WITHOUT STATE
+    return f"CUS{account_no}"
+
+
+def bankone_account(account_no, balance):
+    return {
+        "NUBAN": str(account_no), "AccountType": "SAVINGS", "withdrawableAmount": balance,
+        "ledgerBalance": balance, "AccountStatus": "Active",
+    }
+
+
+# ROUTES: (SERVICE, METHOD, PATH PATTERN, ENDPOINT NAME, HANDLER NAME)
+ROUTES = [
+    ("bankone", "GET", r"/Customer/GetByAccountNo/\w+", "enquiry", "account_by_account_no"),
+    ("bankone", "GET", r"/Account/GetAccountsByCustomerId/\w+", "enquiry", "accounts_by_customer_id"),
+    ("bankone", "POST", r"/Messaging/SaveBulkSms/\w+", "messaging", "messaging"),
+    ("bankone", "GET", r"/Messaging/SaveEmail/\w+", "messaging", "messaging"),
+    ("3ps", "POST", r"/CoreTransactions/LocalFundsTransfer", "transfer", "core_transaction"),
+    ("3ps", "POST", r"/CoreTransactions/Reversal", "reversal", "core_transaction"),
+    ("tm", "GET", r"/data/creditswitch/networks", "get_networks", "networks"),
+    ("tm", "GET", r"/data/plans", "get_data_plan", "data_plans"),
+    ("tm", "POST", r"/airtime", "purchase_airtime", "bill_payment"),
+    ("tm", "POST", r"/data", "purchase_data", "bill_payment"),
+    ("tm", "GET", r"/serviceBiller/\w+", "get_services", "services"),
+    ("tm", "GET", r"/electricity/getDiscos", "get_discos", "discos"),
+    ("tm", "POST", r"/electricity/validate", "validate_meter_no", "validate_meter"),
+    ("tm", "POST", r"/electricity/vend", "electricity", "vend"),
+    ("tm", "GET", r"/electricity/query", "retry_electricity", "query_vend"),
+    ("tm", "GET", r"/\w+/(products|addons)", "get_service_products", "service_products"),
+    ("tm", "POST", r"/\w+/validate", "validate_scn", "cable_tv"),
+]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "CITUpstreamStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else ""
+        if "json" in (self.headers.get("Content-Type") or ""):
+            return json.loads(body or "null")
+        return {key: values[-1] for key, values in parse_qs(body).items()}
+
+    def send_json(self, status_code, data):
+        body = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def dispatch(self, method):
+        url = urlparse(self.path)
+        if url.path == "/__stats":
+            return self.send_json(200, self.server.get_stats())
+
+        service, _, path = url.path.lstrip("/").partition("/")
+        path = f"/{path}"
+        for route_service, route_method, pattern, endpoint, handler in ROUTES:
+            if route_service == service and route_method == method and re.fullmatch(pattern, path):
+                break
+        else:
+            self.server.count(f"{service}:unmatched")
+            return self.send_json(404, {"error": {"message": f"No stub route for {method} {url.path}"}})
+
+        config = self.server.config
+        self.server.count(f"{service}:{endpoint}")
+        time.sleep(config.delay(endpoint))
+
+        if config.fails(endpoint):
+            self.server.count(f"{service}:{endpoint}:error")
+            if service == "tm":
+                return self.send_json(500, {"error": {"message": "Stub upstream error"}})
+            return self.send_json(500, {"IsSuccessful": False, "ResponseCode": "96", "ResponseMessage": "System malfunction"})
+
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        status_code, data = getattr(self, f"handle_{handler}")(query, self.read_body(), path)
+        self.send_json(status_code, data)
+
+    # BANKONE
+
+    def handle_account_by_account_no(self, query, body, path):
+        account_no = query.get("accountNumber", "")
+        if not re.fullmatch(r"\d{10}", account_no):
+            return 400, [{"error-Message": "Invalid account number"}]
+        return 200, {
+            "CustomerDetails": {
+                "CustomerID": customer_id(account_no), "BVN": f"22{account_no[-9:]}",
+                "Email": f"stub{account_no}@example.com", "Name": "STUB, CUSTOMER",
+                "PhoneNumber": f"080{account_no[-8:]}", "DateOfBirth": "1990-01-01", "Gender": "Male",
+            },
+            "Accounts": [bankone_account(account_no, self.server.config.balance)],
+        }
+
+    def handle_accounts_by_customer_id(self, query, body, path):
+        account_no = query.get("customerId", "").replace("CUS", "", 1)
+        return 200, {"Accounts": [bankone_account(account_no, self.server.config.balance)]}
+
+    def handle_messaging(self, query, body, path):
+        return 200, {"Status": True, "ErrorMessage": None}
+
+    def handle_core_transaction(self, query, body, path):
+        code = self.server.config.response_code()
+        return 200, {
+            "IsSuccessful": True, "ResponseCode": code, "Reference": reference(),
+            "ResponseMessage": "Approved" if code == "00" else "Declined", "Status": "Successful" if code == "00" else "Failed",
+        }
+
+    # TM SAAS
+
+    def handle_networks(self, query, body, path):
+        return 200, {"data": [{"name": network, "code": network.lower()} for network in NETWORKS]}
+
+    def handle_data_plans(self, query, body, path):
+        network = query.get("network", "MTN")
+        return 200, {"data": [
+            {"name": f"{network} {size}GB", "price": price, "validity": "30 days", "planId": f"{network}-{size}"}
+            for size, price in ((1, 300), (2, 500), (5, 1500), (10, 3000))
+        ]}
+
+    def handle_bill_payment(self, query, body, path):
+        return 200, {"data": {"status": "success", "transactionId": reference(), "billId": reference()}}
+
+    def handle_services(self, query, body, path):
+        return 200, {"data": {"billers": [{"name": name, "slug": name} for name in ("dstv", "gotv", "startimes")]}}
+
+    def handle_service_products(self, query, body, path):
+        return 200, {"data": [
+            {"name": f"Bouquet {code}", "code": f"PRD{code}", "price": price, "month": 1}
+            for code, price in ((1, 2500), (2, 6200), (3, 10500))
+        ]}
+
+    def handle_cable_tv(self, query, body, path):
+        # VALIDATE AND SUBSCRIPTION SHARE THIS URL IN tm_saas.api
+        return 200, {"data": {
+            "status": "success", "transactionId": reference(), "customerName": "STUB CUSTOMER",
+            "customerNumber": body.get("smartCardNumber") or body.get("smartcardNumber"),
+        }}
+
+    def handle_discos(self, query, body, path):
+        return 200, {"data": [{"name": disco, "code": disco} for disco in DISCOS]}
+
+    def handle_validate_meter(self, query, body, path):
+        meter_no = body.get("customerReference", "")
+        return 200, {"data": {
+            "name": "STUB CUSTOMER", "customerName": "STUB CUSTOMER", "firstName": "STUB", "lastName": "CUSTOMER",
+            "address": "1 Stub Street", "customerAddress": "1 Stub Street", "customerDistrict": "Stub",
+            "customerAccountType": "NMD", "accountNumber": meter_no, "customerDtNumber": "000",
+        }}
+
+    def handle_vend(self, query, body, path):
+        pending = self.server.config.chance(self.server.config.vend_pending_rate)
+        token = None if pending else "-".join(str(uuid.uuid4().int)[i:i + 4] for i in range(0, 20, 4))
+        return 200, {"data": {
+            "transactionId": reference(), "billId": reference(),
+            "providerResponse": {"status": "PENDING" if pending else "ACCEPTED", "creditToken": token, "token": token},
+        }}
+
+    def handle_query_vend(self, query, body, path):
+        token = "-".join(str(uuid.uuid4().int)[i:i + 4] for i in range(0, 20, 4))
+        return 200, {"data": {"status": "ACCEPTED", "transactionId": query.get("transactionId"), "standardTokenValue": token}}
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, config, verbose=False):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.verbose = verbose
+        self.counts = Counter()
+        self.counts_lock = threading.Lock()
+
+    def count(self, key):
+        with self.counts_lock:
+            self.counts[key] += 1
+
+    def get_stats(self):
+        with self.counts_lock:
+            return dict(self.counts)
+
+
+def add_arguments(parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", default="fixed:0", help="Default latency spec, e.g. lognormal:120,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--response-codes", default="00=1", help="BankOne ResponseCode mix, e.g. 00=0.9,51=0.1")
+    parser.add_argument("--vend-pending-rate", type=float, default=0.0, help="Share of electricity vends left PENDING")
+    parser.add_argument("--balance", default=DEFAULT_BALANCE, help="withdrawableAmount returned for every account")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible latency and error draws")
+    parser.add_argument("--config", help="JSON file with per-endpoint latency and error_rate overrides")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+
+
+def build_server(options):
+    return StubServer((options["host"], options["port"]), StubConfig.from_options(options), options.get("verbose"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the BankOne and TM SaaS stub server")
+    add_arguments(parser)
+    server = build_server(vars(parser.parse_args()))
+    print(f"Upstream stub listening on http://{server.server_address[0]}:{server.server_address[1]}")
+    server.serve_forever()
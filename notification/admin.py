@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import OutboundMessage
+
+
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ['channel', 'receiver', 'status', 'attempts', 'next_attempt_at', 'created_on']
+    list_filter = ['channel', 'status']
+
+
+admin.site.register(OutboundMessage, OutboundMessageAdmin)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notification.utils import purge_finished
+
+
+class Command(BaseCommand):
+    help = "Delete sent and failed notifications older than NOTIFICATION_RETENTION"
+
+    def handle(self, *args, **options):
+        deleted = purge_finished()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} finished notifications"))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notification.utils import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = "Deliver queued SMS and email notifications through BankOne"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the due messages once and exit")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--interval", type=float, default=2, help="Seconds to sleep when the outbox is empty")
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                processed = dispatch_pending(options["batch_size"])
+                total += processed
+                if processed:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} notifications"))
@@ -0,0 +1,34 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+CHANNEL_CHOICES = (
+    ('sms', 'SMS'), ('email', 'Email')
+)
+
+MESSAGE_STATUS_CHOICES = (
+    ('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')
+)
+
+
+class OutboundMessage(models.Model):
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default='sms')
+    account_no = models.CharField(max_length=10, blank=True, null=True)
+    sender = models.CharField(max_length=200, blank=True, null=True)
+    receiver = models.CharField(max_length=200)
+    subject = models.CharField(max_length=300, blank=True, null=True)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=MESSAGE_STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], name='outbound_pending_idx', condition=Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} -> {self.receiver}: {self.status}"
@@ -0,0 +1,56 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import OutboundMessage
+from .utils import dispatch_pending, queue_email, queue_sms
+
+
+@override_settings(NOTIFICATION_SMS_CHUNK_SIZE=1)
+class DispatchPendingTest(TestCase):
+
+    def setUp(self):
+        for receiver in ["0801", "0802"]:
+            queue_sms("0000000001", f"OTP for {receiver}", receiver)
+
+    def test_each_chunk_is_saved_as_it_is_sent(self):
+        def reply(messages):
+            if messages[0][2] == "0802":
+                raise ConnectionError("timed out")
+            return {"Status": True}
+
+        with mock.patch("notification.utils.send_bulk_sms", side_effect=reply):
+            self.assertEqual(dispatch_pending(), 2)
+
+        sent, failed = OutboundMessage.objects.get(receiver="0801"), OutboundMessage.objects.get(receiver="0802")
+        self.assertEqual((sent.status, sent.body), ("sent", ""))
+        self.assertEqual((failed.status, failed.attempts, failed.last_error), ("pending", 1, "timed out"))
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+
+    def test_claimed_messages_are_skipped_while_being_sent(self):
+        claimed = []
+
+        def reply(messages):
+            # ANOTHER WORKER RUNNING NOW FINDS NOTHING DUE
+            claimed.append(dispatch_pending())
+            return {"Status": True}
+
+        with mock.patch("notification.utils.send_bulk_sms", side_effect=reply):
+            dispatch_pending()
+
+        self.assertEqual(claimed, [0, 0])
+        self.assertEqual(OutboundMessage.objects.filter(status="sent").count(), 2)
+
+    @override_settings(NOTIFICATION_CLAIM_TIMEOUT=0)
+    def test_nothing_is_sent_after_the_claim_expires(self):
+        queue_email("user@example.com", "Reset", "Your code is 1234")
+
+        with mock.patch("notification.utils.send_bulk_sms") as send_bulk_sms, \
+                mock.patch("notification.utils.send_email") as send_email:
+            self.assertEqual(dispatch_pending(), 3)
+
+        send_bulk_sms.assert_not_called()
+        send_email.assert_not_called()
+        # LEFT DUE FOR THE NEXT WORKER, BODIES INTACT
+        self.assertEqual(OutboundMessage.objects.filter(status="pending", attempts=0).exclude(body="").count(), 3)
@@ -0,0 +1,130 @@
+import datetime
+import logging
+
+from django.conf import settings
+from django.db.transaction import atomic
+from django.utils import timezone
+
+from bankone.api import send_bulk_sms, send_email, send_enquiry_email
+from .models import OutboundMessage
+
+logger = logging.getLogger(__name__)
+
+
+def queue_sms(account_no, content, receiver):
+    return OutboundMessage.objects.create(channel='sms', account_no=account_no, receiver=receiver, body=content)
+
+
+def queue_email(to, subject, body, mail_from=None):
+    return OutboundMessage.objects.create(channel='email', sender=mail_from, receiver=to, subject=subject, body=body)
+
+
+def _mark_sent(message):
+    # Bodies carry OTPs and tokens, so they are not kept once the message is out
+    message.status = 'sent'
+    message.attempts += 1
+    message.last_error = None
+    message.body = ''
+
+
+def _mark_failed(message, error):
+    message.attempts += 1
+    message.last_error = str(error)[:1000]
+    if message.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+        message.status = 'failed'
+        message.body = ''
+        return
+    delay = min(settings.NOTIFICATION_RETRY_DELAY * 2 ** (message.attempts - 1), settings.NOTIFICATION_MAX_RETRY_DELAY)
+    message.next_attempt_at = timezone.now() + datetime.timedelta(seconds=delay)
+
+
+def _save_outcome(messages):
+    now = timezone.now()
+    for message in messages:
+        message.updated_on = now
+    OutboundMessage.objects.bulk_update(
+        messages, ['status', 'body', 'attempts', 'next_attempt_at', 'last_error', 'updated_on']
+    )
+
+
+def _send_sms_batch(messages, claimed_until):
+    chunk_size = settings.NOTIFICATION_SMS_CHUNK_SIZE
+    for start in range(0, len(messages), chunk_size):
+        if timezone.now() >= claimed_until:
+            return
+        chunk = messages[start:start + chunk_size]
+        try:
+            response = send_bulk_sms([(message.account_no, message.body, message.receiver) for message in chunk])
+            if isinstance(response, dict) and response.get('Status') is False:
+                raise ValueError(response.get('ErrorMessage') or response)
+        except Exception as ex:
+            for message in chunk:
+                _mark_failed(message, ex)
+        else:
+            for message in chunk:
+                _mark_sent(message)
+        _save_outcome(chunk)
+
+
+def _send_email(message):
+    try:
+        if message.sender:
+            send_enquiry_email(message.sender, message.receiver, message.subject, message.body)
+        else:
+            send_email(message.receiver, message.subject, message.body)
+    except Exception as ex:
+        _mark_failed(message, ex)
+    else:
+        _mark_sent(message)
+    _save_outcome([message])
+
+
+def claim_pending(batch_size):
+    # Claimed rows get next_attempt_at pushed ahead, so other workers skip them while BankOne is called
+    # without a lock. Rows not sent before the claim expires, by a slow or dead worker, are due again.
+    now = timezone.now()
+    with atomic():
+        messages = list(
+            OutboundMessage.objects.select_for_update(skip_locked=True).filter(
+                status='pending', next_attempt_at__lte=now
+            ).order_by('next_attempt_at')[:batch_size]
+        )
+        claimed_until = now + datetime.timedelta(seconds=settings.NOTIFICATION_CLAIM_TIMEOUT)
+        OutboundMessage.objects.filter(id__in=[message.id for message in messages]).update(
+            next_attempt_at=claimed_until
+        )
+    return messages, claimed_until
+
+
+def dispatch_pending(batch_size=None):
+    """
+    Send one batch of due messages and return how many were processed.
+
+    The batch is claimed in a short transaction and sent outside it, and each SMS chunk or email is saved
+    as soon as BankOne answers, so several workers can drain the outbox together and a failed save does not
+    send the rest of the batch again.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+
+    messages, claimed_until = claim_pending(batch_size)
+    if not messages:
+        return 0
+
+    _send_sms_batch([message for message in messages if message.channel == 'sms'], claimed_until)
+    for message in messages:
+        # ONCE THE CLAIM HAS EXPIRED THE REST ARE DUE AGAIN AND MAY ALREADY BELONG TO ANOTHER WORKER
+        if message.channel == 'email' and timezone.now() < claimed_until:
+            _send_email(message)
+
+    failed = len([message for message in messages if message.status != 'sent'])
+    if failed:
+        logger.warning("Outbound notifications: %s of %s messages not sent, will retry", failed, len(messages))
+    return len(messages)
+
+
+def purge_finished(retention=None):
+    """Delete sent and failed messages last updated more than NOTIFICATION_RETENTION seconds ago."""
+    retention = settings.NOTIFICATION_RETENTION if retention is None else retention
+    expired = timezone.now() - datetime.timedelta(seconds=retention)
+    deleted, _ = OutboundMessage.objects.filter(status__in=['sent', 'failed'], updated_on__lt=expired).delete()
+    return deleted
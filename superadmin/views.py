@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.paginator import Paginator
 from django.db.models import Q
 from django.shortcuts import render
 from account.models import *
@@ -13,6 +15,13 @@ def dashboard(request):
         query |= Q(gender__icontains=var) | Q(phone_number__iexact=var)
 
         customers = Customer.objects.filter(query)
+
+    customers = customers.select_related('user').prefetch_related('customeraccount_set').order_by('-created_on', '-id')
+    page = Paginator(customers, settings.ADMIN_LIST_PAGE_SIZE).get_page(request.GET.get('page'))
+    query_string = request.GET.copy()
+    query_string.pop('page', None)
     return render(request, 'superadmin/index.html', {
-        'customers': customers,
+        'customers': page,
+        'page_obj': page,
+        'query_string': query_string.urlencode(),
     })
@@ -1,27 +1,34 @@
-import requests
 from django.conf import settings
 from bankone.api import log_request
+from tm_saas.client import TMClient
 
 baseUrl = settings.TM_BASE_URL
 header = {
     "client-id": settings.TM_CLIENT_ID
 }
+client = TMClient()
+
+
+def client_stats():
+    return client.stats()
 
 
 def get_networks():
     url = f"{baseUrl}/data/creditswitch/networks"
 
-    response = requests.request("GET", url=url, headers=header).json()
-    log_request("GET", f"url: {url}", f"header: {header}", f"response: {response}")
-    return response
+    response = client.request("GET", url=url, headers=header, endpoint="get_networks")
+    result = response.json()
+    log_request("GET", url, response=result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def get_data_plan(network_name):
     url = f"{baseUrl}/data/plans?provider=creditswitch&network={network_name}"
 
-    response = requests.request("GET", url=url, headers=header).json()
-    log_request("GET", f"url: {url}", f"header: {header}", f"response: {response}")
-    return response
+    response = client.request("GET", url=url, headers=header, endpoint="get_data_plan")
+    result = response.json()
+    log_request("GET", url, response=result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def purchase_airtime(**kwargs):
@@ -33,9 +40,10 @@ def purchase_airtime(**kwargs):
     payload["network"] = kwargs.get("network")
     payload["amount"] = kwargs.get("amount")
 
-    response = requests.request("POST", url=url, headers=header, data=payload).json()
-    log_request("POST", f"url: {url}", f"header: {header}", f"payload: {payload}", f"response: {response}")
-    return response
+    response = client.request("POST", url=url, headers=header, data=payload, endpoint="purchase_airtime")
+    result = response.json()
+    log_request("POST", url, payload, result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def purchase_data(**kwargs):
@@ -48,17 +56,19 @@ def purchase_data(**kwargs):
     payload["amount"] = kwargs.get("amount")
     payload["network"] = kwargs.get("network")
 
-    response = requests.request("POST", url=url, headers=header, data=payload).json()
-    log_request("POST", f"url: {url}", f"header: {header}", f"payload: {payload}", f"response: {response}")
-    return response
+    response = client.request("POST", url=url, headers=header, data=payload, endpoint="purchase_data")
+    result = response.json()
+    log_request("POST", url, payload, result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def get_services(service_type):
     url = f"{baseUrl}/serviceBiller/{service_type}"
 
-    response = requests.request("GET", url=url, headers=header).json()
-    log_request("GET", f"url: {url}", f"header: {header}", f"response: {response}")
-    return response
+    response = client.request("GET", url=url, headers=header, endpoint="get_services")
+    result = response.json()
+    log_request("GET", url, response=result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def get_service_products(service_name, product_code=None):
@@ -66,9 +76,10 @@ def get_service_products(service_name, product_code=None):
     if product_code:
         url = f"{baseUrl}/{service_name}/addons?provider=cdl&productCode={product_code}"
 
-    response = requests.request("GET", url=url, headers=header).json()
-    log_request("GET", f"url: {url}", f"header: {header}", f"response: {response}")
-    return response
+    response = client.request("GET", url=url, headers=header, endpoint="get_service_products")
+    result = response.json()
+    log_request("GET", url, response=result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def validate_scn(service_name, scn):
@@ -80,9 +91,10 @@ def validate_scn(service_name, scn):
     }
     payload = f"provider=cdl&smartCardNumber={scn}"
 
-    response = requests.request("POST", url=url, headers=d_header, data=payload).json()
-    log_request("POST", f"url: {url}", f"header: {d_header}", f"payload: {payload}", f"response: {response}")
-    return response
+    response = client.request("POST", url=url, headers=d_header, data=payload, endpoint="validate_scn")
+    result = response.json()
+    log_request("POST", url, payload, result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def cable_tv_sub(**kwargs):
@@ -99,16 +111,18 @@ def cable_tv_sub(**kwargs):
                 "smartcardNumber": kwargs.get("smart_card_no")
             }
 
-    response = requests.request("POST", url=url, headers=header, data=payload).json()
-    log_request("POST", f"url: {url}", f"header: {header}", f"payload: {payload}", f"response: {response}")
-    return response
+    response = client.request("POST", url=url, headers=header, data=payload, endpoint="cable_tv_sub")
+    result = response.json()
+    log_request("POST", url, payload, result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def get_discos():
     url = f"{baseUrl}/electricity/getDiscos"
-    response = requests.request("GET", url, headers=header).json()
-    log_request("POST", f"url: {url}", f"header: {header}", f"response: {response}")
-    return response
+    response = client.request("GET", url, headers=header, endpoint="get_discos")
+    result = response.json()
+    log_request("GET", url, response=result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def validate_meter_no(disco_type, meter_no):
@@ -118,23 +132,26 @@ def validate_meter_no(disco_type, meter_no):
     payload["type"] = disco_type
     payload["customerReference"] = meter_no
 
-    response = requests.request("POST", url, data=payload, headers=header).json()
-    log_request("POST", f"url: {url}", f"header: {header}", f"payload: {payload}", f"response: {response}")
-    return response
+    response = client.request("POST", url, data=payload, headers=header, endpoint="validate_meter_no")
+    result = response.json()
+    log_request("POST", url, payload, result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 def electricity(data):
     url = f"{baseUrl}/electricity/vend"
-    response = requests.request("POST", url, data=data, headers=header).json()
-    log_request("POST", f"url: {url}", f"header: {header}", f"payload: {data}", f"response: {response}")
-    return response
-
-
-def retry_electricity(transaction_id):
-    url = f"{baseUrl}/electricity/query?disco=EKEDC_PREPAID&transactionId={transaction_id}"
-    response = requests.request("GET", url, headers=header).json()
-    log_request("GET", f"url: {url}", f"header: {header}", f"response: {response}")
-    return response
+    response = client.request("POST", url, data=data, headers=header, endpoint="electricity")
+    result = response.json()
+    log_request("POST", url, data, result, status_code=response.status_code, label="tm_saas")
+    return result
+
+
+def retry_electricity(transaction_id, disco="EKEDC_PREPAID"):
+    url = f"{baseUrl}/electricity/query?disco={disco}&transactionId={transaction_id}"
+    response = client.request("GET", url, headers=header, endpoint="retry_electricity")
+    result = response.json()
+    log_request("GET", url, response=result, status_code=response.status_code, label="tm_saas")
+    return result
 
 
 
@@ -0,0 +1,149 @@
+import logging
+import time
+from threading import Thread
+
+from django.conf import settings
+from django.core.cache import cache
+
+from tm_saas import api
+
+CACHE_PREFIX = "tm_catalog"
+REFRESH_LOCK_TIMEOUT = 60
+WARM_LOCK_TIMEOUT = 600
+
+
+def _cache_key(catalog, *parts):
+    key = ":".join([CACHE_PREFIX, catalog] + [str(part).lower() for part in parts if part is not None])
+    return key.replace(" ", "_")
+
+
+def _is_valid(response):
+    return isinstance(response, dict) and "data" in response and "error" not in response
+
+
+def _refresh(catalog, key, fetch, args):
+    response = fetch(*args)
+    if _is_valid(response):
+        ttl = settings.TM_CATALOG_TTL.get(catalog, settings.TM_CATALOG_TTL["default"])
+        entry = {"value": response, "fresh_until": time.time() + ttl}
+        cache.set(key, entry, timeout=ttl + settings.TM_CATALOG_STALE_TTL)
+    return response
+
+
+def _background_refresh(catalog, key, fetch, args):
+    lock_key = f"{key}:refreshing"
+    if not cache.add(lock_key, 1, timeout=REFRESH_LOCK_TIMEOUT):
+        return
+
+    def run():
+        try:
+            _refresh(catalog, key, fetch, args)
+        except Exception as ex:
+            logging.warning("TM catalog refresh failed for %s: %s", key, ex)
+        finally:
+            cache.delete(lock_key)
+
+    Thread(target=run, daemon=True).start()
+
+
+def get_catalog(catalog, fetch, *args, force=False):
+    """
+    Return a TM catalog response from cache, refreshing it in the background once stale.
+
+    A stale entry keeps being served for TM_CATALOG_STALE_TTL seconds, so an upstream
+    outage only surfaces once there is nothing cached at all.
+    """
+    key = _cache_key(catalog, *args)
+    entry = None if force else cache.get(key)
+
+    if entry is not None:
+        if entry["fresh_until"] < time.time():
+            _background_refresh(catalog, key, fetch, args)
+        return entry["value"]
+
+    try:
+        response = _refresh(catalog, key, fetch, args)
+    except Exception:
+        entry = cache.get(key)
+        if entry is None:
+            raise
+        return entry["value"]
+
+    if not _is_valid(response) and force:
+        entry = cache.get(key)
+        if entry is not None:
+            return entry["value"]
+    return response
+
+
+def get_networks(force=False):
+    return get_catalog("networks", api.get_networks, force=force)
+
+
+def get_data_plan(network_name, force=False):
+    return get_catalog("data_plans", api.get_data_plan, network_name, force=force)
+
+
+def get_services(service_type, force=False):
+    return get_catalog("services", api.get_services, service_type, force=force)
+
+
+def get_service_products(service_name, product_code=None, force=False):
+    return get_catalog("service_products", api.get_service_products, service_name, product_code, force=force)
+
+
+def get_discos(force=False):
+    return get_catalog("discos", api.get_discos, force=force)
+
+
+def _network_names(response):
+    names = list()
+    for item in response.get("data") or []:
+        if isinstance(item, dict):
+            item = item.get("name") or item.get("network") or item.get("code")
+        if item:
+            names.append(str(item).lower())
+    return names
+
+
+def warm_catalogs():
+    warmed = list()
+
+    networks = get_networks(force=True)
+    warmed.append("networks")
+    if _is_valid(networks):
+        for network in _network_names(networks):
+            get_data_plan(network, force=True)
+            warmed.append(f"data_plans:{network}")
+
+    get_discos(force=True)
+    warmed.append("discos")
+
+    for service_type in settings.TM_CATALOG_WARM_SERVICE_TYPES:
+        get_services(service_type, force=True)
+        warmed.append(f"services:{service_type}")
+
+    for service_name in settings.TM_CATALOG_WARM_SERVICE_NAMES:
+        get_service_products(service_name, force=True)
+        warmed.append(f"service_products:{service_name}")
+
+    return warmed
+
+
+def warm_catalogs_in_background():
+    # Returns False without starting a thread while an earlier warm is still running
+    lock_key = f"{CACHE_PREFIX}:warming"
+    if not cache.add(lock_key, 1, timeout=WARM_LOCK_TIMEOUT):
+        return False
+
+    def run():
+        try:
+            warmed = warm_catalogs()
+            logging.info("TM catalog warm completed: %s", warmed)
+        except Exception as ex:
+            logging.warning("TM catalog warm failed: %s", ex)
+        finally:
+            cache.delete(lock_key)
+
+    Thread(target=run, daemon=True).start()
+    return True
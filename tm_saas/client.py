@@ -0,0 +1,20 @@
+from django.conf import settings
+
+from bankone.client import PooledClient
+
+
+class TMClient(PooledClient):
+    """
+    Pooled client for the TM SaaS biller API.
+
+    The pool blocks once TM_POOL_SIZE connections are in use so a slow biller cannot
+    open unbounded sockets, and every operation carries its own (connect, read) timeout.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("pool_size", settings.TM_POOL_SIZE)
+        kwargs.setdefault("pool_block", True)
+        kwargs.setdefault("pool_timeout", settings.TM_POOL_TIMEOUT)
+        kwargs.setdefault("timeouts", settings.TM_TIMEOUTS)
+        super().__init__("tm_saas", **kwargs)
+